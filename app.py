@@ -1,84 +1,43 @@
-﻿import random
-import matplotlib.pyplot as plt
+﻿import io
+import threading
+import time
+from collections import OrderedDict
+
 import numpy as np
 import streamlit as st
 
-QBER_THRESHOLD = 0.11
-
-
-def generate_bits(n):
-    return np.random.randint(2, size=n)
-
-
-def generate_bases(n):
-    return np.random.choice(["Z", "X"], size=n)
-
+from bb84.crypto import bytes_to_binary, xor_bytes
+from bb84.engine import QBER_THRESHOLD, get_engine, run_protocol
+from bb84.estimation import SAMPLE_CONFIDENCE
+from bb84.jobs import JobPool
+from bb84.keypool import KeyPool
+from bb84.keystream import ROUND_QUBITS, key_blocks
+from bb84.plotting import RunningQberCurve
+from bb84.profiling import stage
 
-def measure(bits, sender_bases, receiver_bases):
-    result = []
-    for i in range(len(bits)):
-        if sender_bases[i] == receiver_bases[i]:
-            result.append(bits[i])
-        else:
-            result.append(random.randint(0, 1))
-    return np.array(result)
+BASIS_LABELS = np.array(["Z", "X"])
+ENGINE = get_engine("numpy")
+SIMULATION_CACHE_SIZE = 16  # (qubits, eve, seed, engine) results kept per process
+SIMULATION_CHUNK_QUBITS = 250_000
+KEY_POOL_TIMEOUT = 30  # seconds a live-demo request may wait on an empty pool
+KEY_POOL_POLL_SECONDS = 0.2  # slice a live-demo job waits before handing its worker back
+JOB_POLL_SECONDS = 0.5  # refresh interval of the progress bar of a running job
 
 
 def sift_key(sender_bases, receiver_bases, bits):
-    sifted = []
-    indices = []
-    for i in range(len(sender_bases)):
-        if sender_bases[i] == receiver_bases[i]:
-            sifted.append(int(bits[i]))
-            indices.append(i + 1)
-    return np.array(sifted), indices
-
-
-def calculate_qber(key1, key2):
-    errors = np.sum(key1 != key2)
-    return errors / len(key1) if len(key1) > 0 else 1.0
-
-
-def text_to_binary(text):
-    return "".join(format(ord(char), "08b") for char in text)
-
+    mask = sender_bases == receiver_bases
+    return bits[mask], np.flatnonzero(mask) + 1
 
-def binary_to_text(binary):
-    chars = [binary[i : i + 8] for i in range(0, len(binary), 8)]
-    return "".join(chr(int(char, 2)) for char in chars if len(char) == 8)
 
-
-def xor_binary(data, key):
-    return "".join(str(int(data[i]) ^ int(key[i])) for i in range(len(data)))
-
-
-def run_intercept_resend_simulation(total_qubits):
-    alice_bits = generate_bits(total_qubits)
-    alice_bases = generate_bases(total_qubits)
-    eve_bases = generate_bases(total_qubits)
-    bob_bases = generate_bases(total_qubits)
-
-    eve_bits = measure(alice_bits, alice_bases, eve_bases)
-    bob_bits = measure(eve_bits, eve_bases, bob_bases)
-
-    alice_key, sifted_indices = sift_key(alice_bases, bob_bases, alice_bits)
-    bob_key, _ = sift_key(alice_bases, bob_bases, bob_bits)
-
-    qber = calculate_qber(alice_key, bob_key)
-
-    # Running QBER on sifted bits
-    running_errors = []
-    for i in range(len(alice_key)):
-        running_errors.append(int(alice_key[i] != bob_key[i]))
-
-    qber_curve = []
-    if running_errors:
-        cumulative = np.cumsum(running_errors)
-        trials = np.arange(1, len(cumulative) + 1)
-        qber_curve = (cumulative / trials).tolist()
+def sample_table(transmission, eve, limit=20):
+    alice_bits = transmission["alice_bits"]
+    alice_bases = transmission["alice_bases"]
+    eve_bases = transmission["eve_bases"]
+    bob_bases = transmission["bob_bases"]
+    bob_bits = transmission["bob_bits"]
 
     sample_rows = []
-    for i in range(min(20, total_qubits)):
+    for i in range(min(limit, len(alice_bits))):
         status = "Discarded"
         if alice_bases[i] == bob_bases[i]:
             status = "YES" if alice_bits[i] == bob_bits[i] else "ERROR"
@@ -86,59 +45,241 @@ def run_intercept_resend_simulation(total_qubits):
             {
                 "Idx": i + 1,
                 "Alice Bit": int(alice_bits[i]),
-                "Alice Basis": alice_bases[i],
-                "Eve Basis": eve_bases[i],
-                "Bob Basis": bob_bases[i],
+                "Alice Basis": BASIS_LABELS[alice_bases[i]],
+                "Eve Basis": BASIS_LABELS[eve_bases[i]] if eve else "-",
+                "Bob Basis": BASIS_LABELS[bob_bases[i]],
                 "Bob Bit": int(bob_bits[i]),
                 "Status": status,
             }
         )
+    return sample_rows
+
+
+def simulation_steps(total_qubits, eve=True, engine=ENGINE):
+    # Chunked run: the running-QBER curve is downsampled as it grows, so the
+    # chart payload stays at MAX_PLOT_POINTS whatever the qubit count. Yields
+    # progress with the partial curve after every chunk, returns the result.
+    curve = RunningQberCurve()
+    sample_rows = []
+    done = 0
+    while done < total_qubits:
+        n = min(SIMULATION_CHUNK_QUBITS, total_qubits - done)
+        transmission = run_protocol(n, eve=eve, engine=engine)
+        alice_bases = transmission["alice_bases"]
+        bob_bases = transmission["bob_bases"]
+
+        with stage("sift", n):
+            alice_key, sifted_indices = sift_key(alice_bases, bob_bases, transmission["alice_bits"])
+            bob_key, _ = sift_key(alice_bases, bob_bases, transmission["bob_bits"])
+        with stage("curve", n):
+            curve.add(sifted_indices + done, alice_key != bob_key)
+
+        if done == 0:
+            sample_rows = sample_table(transmission, eve)
+        done += n
+        yield {
+            "done": done,
+            "total": total_qubits,
+            "qber": curve.errors / curve.sifted if curve.sifted > 0 else None,
+            "x": curve.x,
+            "y": curve.y,
+        }
 
     return {
-        "qber": qber,
-        "sifted": len(alice_key),
-        "errors": int(np.sum(alice_key != bob_key)) if len(alice_key) > 0 else 0,
-        "qber_curve": qber_curve,
-        "sifted_indices": sifted_indices,
+        "qber": curve.errors / curve.sifted if curve.sifted > 0 else 1.0,
+        "sifted": curve.sifted,
+        "errors": curve.errors,
+        "qber_curve": curve.y,
+        "sifted_indices": curve.x,
         "sample_rows": sample_rows,
     }
 
 
-def run_live_demo(message, eve_attack, n_bits):
-    alice_bits = generate_bits(n_bits)
-    alice_bases = generate_bases(n_bits)
-    bob_bases = generate_bases(n_bits)
+@st.cache_resource
+def simulation_cache():
+    """Process-wide LRU of simulation results and charts, shared by every session."""
+    return {"lock": threading.Lock(), "results": OrderedDict()}
 
-    if eve_attack:
-        eve_bases = generate_bases(n_bits)
-        eve_measure = measure(alice_bits, alice_bases, eve_bases)
-        bob_bits = measure(eve_measure, eve_bases, bob_bases)
-    else:
-        bob_bits = measure(alice_bits, alice_bases, bob_bases)
-
-    alice_key, _ = sift_key(alice_bases, bob_bases, alice_bits)
-    bob_key, _ = sift_key(alice_bases, bob_bases, bob_bits)
-
-    qber = calculate_qber(alice_key, bob_key)
 
-    if len(alice_key) == 0:
-        return {"qber": qber, "ok": False, "reason": "No sifted key generated."}
+def qber_figure(result, eve):
+    """PNG of the running-QBER chart."""
+    from matplotlib.figure import Figure  # pyplot-free, so concurrent jobs can draw; loaded on first chart
 
-    message_binary = text_to_binary(message)
-    key_binary = "".join(map(str, alice_key))
-    key_binary = (key_binary * (len(message_binary) // len(key_binary) + 1))[: len(message_binary)]
-
-    encrypted_binary = xor_binary(message_binary, key_binary)
-    decrypted_binary = xor_binary(encrypted_binary, key_binary)
-    decrypted_message = binary_to_text(decrypted_binary)
+    with stage("plot"):
+        fig = Figure(figsize=(9, 4.5))
+        ax = fig.subplots()
+        if len(result["qber_curve"]) > 0:
+            ax.plot(result["sifted_indices"], result["qber_curve"], color="#22d3ee", linewidth=2, label="Simulated QBER")
+        if eve:
+            ax.axhline(y=0.25, color="#ef4444", linestyle="--", linewidth=2, label="Theory (25%)")
+        ax.set_title("QBER During Intercept-Resend Attack" if eve else "QBER Without Eavesdropper")
+        ax.set_xlabel("Sifted Qubit Index")
+        ax.set_ylabel("QBER")
+        ax.set_ylim(0, 0.5)
+        ax.grid(alpha=0.3)
+        ax.legend()
 
-    return {
-        "qber": qber,
-        "ok": qber < 0.2,
-        "encrypted_binary": encrypted_binary,
-        "decrypted_message": decrypted_message,
-        "alice_key_len": len(alice_key),
-    }
+        buffer = io.BytesIO()
+        fig.savefig(buffer, format="png", dpi=100, bbox_inches="tight")
+    return buffer.getvalue()
+
+
+def simulation_job(cache, total_qubits, eve, seed, engine_name):
+    """Background job: chunked simulation plus its chart, served from the shared LRU on a repeat."""
+    key = (total_qubits, eve, seed, engine_name)
+    with cache["lock"]:
+        entry = cache["results"].get(key)
+        if entry is not None:
+            cache["results"].move_to_end(key)
+
+    if entry is None:
+        # The qiskit engine loads Aer and builds its circuits here on the
+        # worker; Aer segfaults on circuits built in a script thread
+        result = yield from simulation_steps(total_qubits, eve, get_engine(engine_name, seed))
+        entry = {"result": result, "figure_png": qber_figure(result, eve)}
+        with cache["lock"]:
+            cache["results"][key] = entry
+            while len(cache["results"]) > SIMULATION_CACHE_SIZE:
+                cache["results"].popitem(last=False)
+    return entry
+
+
+@st.cache_resource(max_entries=2)
+def key_pool(eve_attack):
+    """Shared key pool per Eve setting, refilled by its own thread."""
+    # Only a sample of each round's sifted key is disclosed for the QBER
+    # check; ROUND_QUBITS rounds are large enough for the sample to reach
+    # the target confidence, smaller ones would be rejected on the bound
+    blocks = key_blocks(ROUND_QUBITS, eve=eve_attack, threshold=0.2, estimation="sample")
+    return KeyPool(blocks, timeout=KEY_POOL_TIMEOUT).start()
+
+
+def live_key_pool(eve_attack):
+    """The shared pool for this Eve setting, rebuilt once it has failed so every run does fresh BB84 rounds."""
+    pool = key_pool(eve_attack)
+    if pool.error is not None:
+        key_pool.clear(eve_attack)
+        pool = key_pool(eve_attack)
+    return pool
+
+
+def show_profile(profile):
+    """Sidebar breakdown of the last profiled run."""
+    st.sidebar.caption(f"Last run: {profile['label']}, {profile['total_seconds'] * 1e3:.1f} ms")
+    rows = [
+        {
+            "Stage": row["stage"],
+            "Calls": row["calls"],
+            "ms": round(row["seconds"] * 1e3, 2),
+            "Share": f"{row['share']:.0%}" if row["share"] is not None else "",
+            "Items/s": f"{row['items_per_s']:,.0f}" if row["items_per_s"] else "",
+            "Peak MiB": round(row["peak_bytes"] / 2**20, 2) if row["peak_bytes"] is not None else None,
+        }
+        for row in profile["stages"]
+    ]
+    st.sidebar.dataframe(rows, use_container_width=True, hide_index=True)
+
+
+def wait_for_key(pool, n_bytes):
+    """Take n_bytes from the pool in short waits, yielding progress in between."""
+    deadline = time.monotonic() + KEY_POOL_TIMEOUT
+    retry = False
+    while True:
+        try:
+            return pool.take(n_bytes, timeout=KEY_POOL_POLL_SECONDS, retry=retry)
+        except TimeoutError:
+            retry = True
+            if time.monotonic() >= deadline:
+                raise TimeoutError(f"Key pool could not supply {n_bytes} bytes within {KEY_POOL_TIMEOUT}s")
+        yield {"done": pool.metrics()["fill_bytes"], "total": n_bytes}
+
+
+def live_demo_job(pool, message):
+    """Background job: encrypt the message with key from the pre-filled pool."""
+    payload = message.encode("utf-8")
+    try:
+        alice_key, bob_key = yield from wait_for_key(pool, len(payload))
+    except (RuntimeError, TimeoutError) as exc:
+        qber = pool.last_qber if pool.last_qber is not None else 1.0
+        output = {"qber": qber, "ok": False, "reason": str(exc)}
+    else:
+        with stage("encrypt", len(payload)):
+            encrypted = xor_bytes(payload, alice_key)
+            decrypted = xor_bytes(encrypted, bob_key)
+        output = {
+            "qber": pool.last_qber,
+            "qber_bound": pool.last_qber_bound,
+            "ok": True,
+            "encrypted": encrypted,
+            "decrypted_message": decrypted.decode("utf-8", errors="replace"),
+            "alice_key_len": len(encrypted) * 8,
+            "rounds": pool.rounds,
+        }
+    output["pool"] = pool.metrics()
+    return output
+
+
+@st.cache_resource
+def job_pool():
+    """Worker threads shared by every session; runs advance chunk by chunk in turn."""
+    return JobPool().start()
+
+
+def start_job(name, steps, label, track_memory=False):
+    """Queue steps as this session's job `name`, cancelling the one it replaces."""
+    previous = st.session_state.pop(name, None)
+    if previous is not None:
+        previous.cancel()
+    try:
+        st.session_state[name] = job_pool().submit(steps, label, track_memory)
+    except RuntimeError as exc:
+        steps.close()
+        st.warning(str(exc))
+
+
+def watch_job(name, show_progress):
+    """Progress and a cancel button while job `name` runs; the job once it has finished."""
+    job = st.session_state.get(name)
+    if job is None or job.finished:
+        return job
+
+    @st.fragment(run_every=JOB_POLL_SECONDS)
+    def poll():
+        if job.finished:
+            st.rerun()  # a full rerun draws the result and drops this poller
+        show_progress(job)
+        if st.button("Cancel", key=f"cancel_{name}"):
+            job.cancel()
+
+    poll()
+    return None
+
+
+def show_simulation_progress(job):
+    progress = job.progress or {"done": 0, "total": 0}
+    text = f"{progress['done']:,} / {progress['total']:,} qubits"
+    if job.progress is None:
+        text = "Queued..." if job.state == "queued" else "Starting..."
+    if progress.get("qber") is not None:
+        text += f", QBER so far {progress['qber']:.2%}"
+    st.progress(job.fraction, text=text)
+    if job.progress is not None and len(progress["x"]) > 0:
+        st.line_chart({"Sifted Qubit Index": progress["x"], "QBER": progress["y"]}, x="Sifted Qubit Index", y="QBER",
+                      height=260)
+
+
+def show_live_progress(job):
+    progress = job.progress or {"done": 0, "total": 0}
+    st.progress(job.fraction, text=f"Waiting for key: {progress['done']} / {progress['total']} bytes in the pool")
+
+
+def take_profile(job):
+    """Put a finished job's stage breakdown (its chunks only) in the sidebar, once."""
+    if st.session_state.get("profiled_job") is not job:
+        st.session_state["profiled_job"] = job
+        st.session_state["last_profile"] = {
+            "label": job.timer.label, "total_seconds": job.timer.total_seconds, "stages": job.timer.report()
+        }
 
 
 st.set_page_config(page_title="Quantum Encryption Exhibition", page_icon="Q", layout="wide")
@@ -177,32 +318,38 @@ st.markdown(
 st.title("Quantum Encryption Project - BB84")
 st.write("Clean exhibition app with two modes: full simulation and live message demo.")
 
+st.sidebar.header("Profiling")
+track_memory = st.sidebar.checkbox("Track memory (tracemalloc)", help="Adds per-stage peak memory; slows runs down")
+
 sim_tab, live_tab = st.tabs(["Simulation", "Live Demo"])
 
 with sim_tab:
     st.subheader("Intercept-Resend Simulation (First Model)")
-    total_qubits = st.slider("Total Qubits", 100, 2000, 350, step=50)
+    total_qubits = st.slider("Total Qubits", 100, 2_000_000, 350, step=50)
+    o1, o2, o3 = st.columns(3)
+    sim_eve = o1.checkbox("Eve Intercepts", value=True)
+    sim_seed = int(o2.number_input("Seed", min_value=0, value=84, step=1))
+    sim_engine = o3.selectbox("Engine", ["numpy", "qiskit"], help="qiskit cross-checks the analytic engine on Aer")
 
     if st.button("Run Simulation", key="run_sim"):
-        result = run_intercept_resend_simulation(total_qubits)
+        steps = simulation_job(simulation_cache(), total_qubits, sim_eve, sim_seed, sim_engine)
+        start_job("sim_job", steps, "simulation", track_memory)
+
+    sim_job = watch_job("sim_job", show_simulation_progress)
+    if sim_job is not None and sim_job.state == "cancelled":
+        st.info("Simulation cancelled.")
+    elif sim_job is not None and sim_job.state == "failed":
+        st.error(f"Simulation failed: {sim_job.error}")
+    elif sim_job is not None:
+        take_profile(sim_job)
+        result = sim_job.result["result"]
 
         c1, c2, c3 = st.columns(3)
         c1.metric("QBER", f"{result['qber']*100:.2f}%")
         c2.metric("Sifted Key Length", result["sifted"])
         c3.metric("Errors", result["errors"])
 
-        fig, ax = plt.subplots(figsize=(9, 4.5))
-        if result["qber_curve"]:
-            ax.plot(result["sifted_indices"], result["qber_curve"], color="#22d3ee", linewidth=2, label="Simulated QBER")
-        ax.axhline(y=0.25, color="#ef4444", linestyle="--", linewidth=2, label="Theory (25%)")
-        ax.set_title("QBER During Intercept-Resend Attack")
-        ax.set_xlabel("Sifted Qubit Index")
-        ax.set_ylabel("QBER")
-        ax.set_ylim(0, 0.5)
-        ax.grid(alpha=0.3)
-        ax.legend()
-        st.pyplot(fig)
-        plt.close(fig)
+        st.image(sim_job.result["figure_png"], use_container_width=True)
 
         st.dataframe(result["sample_rows"], use_container_width=True, hide_index=True)
 
@@ -210,33 +357,60 @@ with live_tab:
     st.subheader("Interactive Live Demo (Message Encryption + QBER)")
     message = st.text_input("Enter Message", value="Welcome to our quantum exhibition")
     eve_attack = st.checkbox("Simulate Eve Attack")
-    n_bits = st.slider("Transmission Bits", 100, 2000, 400, step=50)
 
     if st.button("Start Secure Transmission", key="run_live"):
         if not message.strip():
             st.warning("Please enter a message.")
         else:
-            output = run_live_demo(message, eve_attack, n_bits)
-
-            fig2, ax2 = plt.subplots(figsize=(5, 3))
-            ax2.bar(["QBER"], [output["qber"]], color="#38bdf8")
-            ax2.axhline(y=QBER_THRESHOLD, color="#f59e0b", linestyle="--", label="11% Threshold")
-            ax2.set_ylim(0, 1)
-            ax2.set_ylabel("QBER")
-            ax2.legend()
-            st.pyplot(fig2)
-            plt.close(fig2)
-
-            st.write(f"QBER: {output['qber']:.3f}")
-
-            if not output["ok"]:
-                st.error("Possible eavesdropping detected or insecure channel. Transmission aborted.")
-                if "reason" in output:
-                    st.caption(output["reason"])
-            else:
-                st.success("Secure channel established.")
-                st.code(output["encrypted_binary"][:400] + ("..." if len(output["encrypted_binary"]) > 400 else ""))
-                st.write("Decrypted Message:")
-                st.info(output["decrypted_message"])
-                st.caption(f"Sifted key length: {output['alice_key_len']} bits")
+            start_job("live_job", live_demo_job(live_key_pool(eve_attack), message), "live_demo", track_memory)
+
+    live_job = watch_job("live_job", show_live_progress)
+    if live_job is not None and live_job.state == "cancelled":
+        st.info("Transmission cancelled.")
+    elif live_job is not None and live_job.state == "failed":
+        st.error(f"Transmission failed: {live_job.error}")
+    elif live_job is not None:
+        take_profile(live_job)
+        output = live_job.result
+
+        import matplotlib.pyplot as plt
+
+        fig2, ax2 = plt.subplots(figsize=(5, 3))
+        ax2.bar(["QBER"], [output["qber"]], color="#38bdf8")
+        ax2.axhline(y=QBER_THRESHOLD, color="#f59e0b", linestyle="--", label="11% Threshold")
+        ax2.set_ylim(0, 1)
+        ax2.set_ylabel("QBER")
+        ax2.legend()
+        st.pyplot(fig2)
+        plt.close(fig2)
+
+        st.write(f"QBER: {output['qber']:.3f}")
+        if output.get("qber_bound") is not None:
+            st.caption(
+                f"Estimated from a disclosed sample; the undisclosed key's error rate is at most "
+                f"{output['qber_bound']:.3f} with {SAMPLE_CONFIDENCE:.0%} confidence"
+            )
+
+        if not output["ok"]:
+            st.error("Possible eavesdropping detected or insecure channel. Transmission aborted.")
+            if "reason" in output:
+                st.caption(output["reason"])
+        else:
+            st.success("Secure channel established.")
+            st.code(bytes_to_binary(output["encrypted"][:50]) + ("..." if len(output["encrypted"]) > 50 else ""))
+            st.write("Decrypted Message:")
+            st.info(output["decrypted_message"])
+            st.caption(
+                f"Secret key drawn: {output['alice_key_len']} bits after error correction and "
+                f"privacy amplification, from a pool filled by {output['rounds']} BB84 round(s)"
+            )
+        pool = output["pool"]
+        st.caption(
+            f"Key pool: {pool['fill_level']:.0%} full, refilling at {pool['refill_bits_per_s']:,.0f} bits/s, "
+            f"{pool['starvations']} starvation(s), {pool['bytes_served']} bytes served"
+        )
 
+if "last_profile" in st.session_state:
+    show_profile(st.session_state["last_profile"])
+else:
+    st.sidebar.caption("Run a simulation or the live demo to see its stage breakdown.")
@@ -0,0 +1,22 @@
+from bb84.engine import ENGINES, QBER_THRESHOLD, Engine, NumpyEngine, QiskitEngine, get_engine, run_protocol, sift
+
+# -------------------------------
+# BB84 PACKAGE
+# -------------------------------
+# Importing the package (or any module but bb84.aer) only loads NumPy.
+# qiskit and Aer are imported by bb84.aer, which QiskitEngine loads the
+# first time it measures; the simulators themselves are created on first
+# run. matplotlib is imported inside the functions that draw a chart.
+# Command-line entry points: python -m bb84 (batch CLI), python -m
+# bb84.aer (Aer intercept-resend demo), python -m bb84.secure_comm, ...
+
+__all__ = [
+    "ENGINES",
+    "QBER_THRESHOLD",
+    "Engine",
+    "NumpyEngine",
+    "QiskitEngine",
+    "get_engine",
+    "run_protocol",
+    "sift",
+]
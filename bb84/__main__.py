@@ -0,0 +1,3 @@
+from bb84.cli import main
+
+main()
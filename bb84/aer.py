@@ -0,0 +1,334 @@
+from functools import lru_cache
+
+import numpy as np
+from qiskit import ClassicalRegister, QuantumCircuit, QuantumRegister, transpile
+from qiskit_aer import AerSimulator
+from qiskit_aer.noise import NoiseModel, depolarizing_error
+
+from bb84.engine import QiskitEngine, get_engine, run_protocol
+from bb84.plotting import downsample_curve
+from bb84.profiling import format_report, profiled, stage
+
+# --- CONFIGURATION ---
+TOTAL_QUBITS = 350  # Set to 1000 as requested
+BATCH_WIDTH = 64  # BB84 qubits packed into one wide circuit in "batched" mode
+_CIRCUIT_CACHE = {}  # (bit, prep basis, measure basis) -> transpiled circuit
+
+# --- PART 1: CORE BB84 FUNCTIONS ---
+
+@lru_cache(maxsize=None)
+def simulator():
+    """Shared AerSimulator, created on first use rather than at import."""
+    return AerSimulator()
+
+@lru_cache(maxsize=None)
+def batch_simulator():
+    """
+    BB84 circuits only use X, H and measurements, so the wide circuits of the
+    batched mode run on the stabilizer method instead of a 2^n statevector.
+    """
+    return AerSimulator(method="stabilizer")
+
+def encode_qubits(bits, bases):
+    """Alice prepares qubits."""
+    circuits = []
+    with stage("encode_circuits", len(bits)):
+        for bit, basis in zip(bits, bases):
+            qc = QuantumCircuit(1, 1)
+            if bit == 1:
+                qc.x(0)  # Flip to |1>
+            if basis == 1:
+                qc.h(0)  # Rotate to X basis
+            # Remember the preparation so the "cached" mode can classify it
+            qc.metadata = {"bit": int(bit), "basis": int(basis)}
+            circuits.append(qc)
+    return circuits
+
+def cached_circuit(bit, prep_basis, measure_basis):
+    """Transpiled prepare-and-measure circuit for one of the 8 BB84 classes."""
+    key = (int(bit), int(prep_basis), int(measure_basis))
+    if key not in _CIRCUIT_CACHE:
+        qc = QuantumCircuit(1, 1)
+        if key[0] == 1:
+            qc.x(0)
+        if key[1] == 1:
+            qc.h(0)
+        if key[2] == 1:
+            qc.h(0)
+        qc.measure(0, 0)
+        _CIRCUIT_CACHE[key] = transpile(qc, simulator())
+    return _CIRCUIT_CACHE[key]
+
+@lru_cache(maxsize=None)
+def depolarizing_noise_model(probability):
+    """Aer noise model depolarizing every qubit right before it is measured."""
+    noise_model = NoiseModel()
+    noise_model.add_all_qubit_quantum_error(depolarizing_error(probability, 1), ["measure"])
+    return noise_model
+
+def measure_classes(bits, prep_bases, measure_bases, noise_model=None, seed_simulator=None):
+    """
+    Measure prepared bits without building a circuit per qubit:
+    1. Groups the qubits into the 8 (bit, prep basis, measure basis) classes
+    2. Runs each class once on Aer with shots = class size
+    3. Scatters the sampled outcomes back to the original indices
+    seed_simulator makes the Aer sampling reproducible (each class runs
+    with seed_simulator + class).
+    """
+    bits = np.asarray(bits, dtype=np.int64)
+    classes = bits * 4 + np.asarray(prep_bases, dtype=np.int64) * 2 + np.asarray(measure_bases, dtype=np.int64)
+    results = np.zeros(len(bits), dtype=np.int64)
+    with stage("aer_measure", len(bits)):
+        for cls in np.unique(classes):
+            idx = np.flatnonzero(classes == cls)
+            qc = cached_circuit(cls >> 2 & 1, cls >> 1 & 1, cls & 1)
+            seed = None if seed_simulator is None else seed_simulator + int(cls)
+            job = simulator().run(qc, shots=len(idx), memory=True, noise_model=noise_model, seed_simulator=seed)
+            results[idx] = np.array(job.result().get_memory(), dtype=np.int64)
+    return results
+
+def measure_qubits(circuits, bases, mode="sequential", noise_model=None, seed_simulator=None):
+    """Bob (or Eve) measures qubits.
+
+    mode="sequential" transpiles and runs every qubit on its own.
+    mode="batched" packs the qubits into wide circuits, transpiles them
+    once and sends them to Aer in a single run() call.
+    mode="cached" reads the preparation back from the circuit metadata and
+    samples every class of qubit with one cached circuit (see measure_classes).
+    mode="dynamic" measures like "batched"; it only differs when Eve is in
+    the chain (see intercept_resend_dynamic).
+    An optional Aer noise_model (e.g. depolarizing_noise_model) applies to
+    every mode, and seed_simulator makes the outcomes reproducible.
+    """
+    if mode in ("batched", "dynamic"):
+        return _measure_qubits_batched(circuits, bases, noise_model, seed_simulator)
+    if mode == "cached":
+        bits = [qc.metadata["bit"] for qc in circuits]
+        prep_bases = [qc.metadata["basis"] for qc in circuits]
+        return measure_classes(bits, prep_bases, bases, noise_model, seed_simulator).tolist()
+    if mode != "sequential":
+        raise ValueError(f"Unknown measurement mode: {mode!r}")
+
+    results = []
+    with stage("aer_measure", len(circuits)):
+        for i, (qc, basis) in enumerate(zip(circuits, bases)):
+            measure_qc = qc.copy()
+            if basis == 1:
+                measure_qc.h(0)  # Rotate if measuring in X basis
+            measure_qc.measure(0, 0)
+
+            # Run on Simulator
+            transpiled_qc = transpile(measure_qc, simulator())
+            seed = None if seed_simulator is None else seed_simulator + i
+            job = simulator().run(transpiled_qc, shots=1, memory=True, noise_model=noise_model, seed_simulator=seed)
+            result = int(job.result().get_memory()[0])
+            results.append(result)
+    return results
+
+def _measure_qubits_batched(circuits, bases, noise_model=None, seed_simulator=None):
+    """Measure BATCH_WIDTH qubits per circuit, all circuits in one Aer job."""
+    wide_circuits = []
+    with stage("batch_circuits", len(circuits)):
+        for start in range(0, len(circuits), BATCH_WIDTH):
+            chunk = list(zip(circuits[start:start + BATCH_WIDTH], bases[start:start + BATCH_WIDTH]))
+            wide_qc = QuantumCircuit(len(chunk), len(chunk))
+            for k, (qc, basis) in enumerate(chunk):
+                wide_qc.compose(qc, qubits=[k], clbits=[k], inplace=True)
+                if basis == 1:
+                    wide_qc.h(k)  # Rotate if measuring in X basis
+            wide_qc.measure(range(len(chunk)), range(len(chunk)))
+            wide_circuits.append(wide_qc)
+
+    if not wide_circuits:
+        return []
+
+    # One transpile and one run() for the whole batch; Aer spreads the
+    # experiments over its thread pool.
+    with stage("transpile", len(circuits)):
+        transpiled = transpile(wide_circuits, batch_simulator())
+    with stage("aer_measure", len(circuits)):
+        job = batch_simulator().run(
+            transpiled, shots=1, memory=True, max_parallel_experiments=0, noise_model=noise_model,
+            seed_simulator=seed_simulator,
+        )
+        result = job.result()
+
+    results = []
+    for i in range(len(wide_circuits)):
+        # Memory strings are little-endian: clbit 0 is the last character.
+        bitstring = result.get_memory(i)[0]
+        results.extend(int(bit) for bit in reversed(bitstring))
+    return results
+
+def intercept_resend_dynamic(bits, alice_bases, eve_bases, bob_bases, noise_model=None, seed_simulator=None):
+    """
+    Alice -> Eve -> Bob as dynamic circuits, BATCH_WIDTH qubits per circuit:
+    1. Alice prepares and Eve measures mid-circuit in her basis
+    2. Eve resets the qubit and re-prepares her result (X conditioned on
+       her classical bit, H for her basis)
+    3. Bob measures in his basis
+    All circuits go to Aer in one run() call; returns (eve_bits, bob_bits).
+    """
+    bits, alice_bases = np.asarray(bits).tolist(), np.asarray(alice_bases).tolist()
+    eve_bases, bob_bases = np.asarray(eve_bases).tolist(), np.asarray(bob_bases).tolist()
+    n = len(bits)
+    circuits = []
+    with stage("dynamic_circuits", n):
+        for start in range(0, n, BATCH_WIDTH):
+            width = min(BATCH_WIDTH, n - start)
+            eve_reg, bob_reg = ClassicalRegister(width, "eve"), ClassicalRegister(width, "bob")
+            qc = QuantumCircuit(QuantumRegister(width, "q"), eve_reg, bob_reg)
+            for k, i in enumerate(range(start, start + width)):
+                if bits[i] == 1:
+                    qc.x(k)
+                if alice_bases[i] == 1:
+                    qc.h(k)
+                if eve_bases[i] == 1:
+                    qc.h(k)
+                qc.measure(k, eve_reg[k])
+                qc.reset(k)
+                with qc.if_test((eve_reg[k], 1)):
+                    qc.x(k)
+                if eve_bases[i] == 1:
+                    qc.h(k)
+                if bob_bases[i] == 1:
+                    qc.h(k)
+                qc.measure(k, bob_reg[k])
+            circuits.append(qc)
+
+    if not circuits:
+        return np.empty(0, dtype=np.uint8), np.empty(0, dtype=np.uint8)
+
+    # X, H, measure, reset and if_else are all native to Aer, so the
+    # circuits skip transpile (the slowest step of the batched mode)
+    with stage("aer_measure", n):
+        job = batch_simulator().run(
+            circuits, shots=1, memory=True, max_parallel_experiments=0, noise_model=noise_model,
+            seed_simulator=seed_simulator,
+        )
+        result = job.result()
+
+    eve_bits, bob_bits = [], []
+    for i in range(len(circuits)):
+        # Registers are space-separated, last register first; each is little-endian
+        bob_string, eve_string = result.get_memory(i)[0].split()
+        eve_bits.extend(int(bit) for bit in reversed(eve_string))
+        bob_bits.extend(int(bit) for bit in reversed(bob_string))
+    return np.array(eve_bits, dtype=np.uint8), np.array(bob_bits, dtype=np.uint8)
+
+def eve_intercept_resend(circuits, alice_bases, mode="sequential"):
+    """
+    Eve's Attack:
+    1. Intercepts (measures in random basis)
+    2. Resends (encodes her result in her basis)
+    """
+    n = len(circuits)
+    eve_bases = np.random.randint(0, 2, n)
+    
+    # Eve measures
+    eve_bits = measure_qubits(circuits, eve_bases, mode=mode)
+    
+    # Eve creates NEW qubits to send to Bob
+    new_circuits = encode_qubits(eve_bits, eve_bases)
+    
+    return new_circuits, eve_bases
+
+# --- PART 2: MAIN SIMULATION ---
+
+def run_simulation(mode="sequential", engine=None):
+    import matplotlib.pyplot as plt  # only the chart needs it; importing bb84.aer stays headless
+
+    with profiled("run_simulation") as timer:
+        print(f"\n--- RUNNING SIMULATION ({TOTAL_QUBITS} Qubits) ---")
+        engine = get_engine(engine or QiskitEngine(mode=mode))
+
+        # 1-4. ALICE PREPARES, EVE ATTACKS, BOB MEASURES
+        print(">> Status: Eve is intercepting the channel...\n")
+        transmission = run_protocol(TOTAL_QUBITS, eve=True, engine=engine)
+        alice_bits = transmission["alice_bits"]
+        alice_bases = transmission["alice_bases"]
+        bob_bases = transmission["bob_bases"]
+        bob_results = transmission["bob_bits"]
+
+        # 5. RESTORED TABLE FORMAT (Like First Code)
+        # Columns: Idx | Alice Bit | Alice Bas | Bob Bas | Bob Bit | Match?
+        print(f"{'Idx':<5} {'Alice Bit':<10} {'Alice Bas':<10} {'Bob Bas':<10} {'Bob Bit':<10} {'Match?'}")
+        print("-" * 65)
+    
+        sifted_indices = []
+        running_errors = []
+        total_errors = 0
+        sifted_count = 0
+    
+        with stage("sift", TOTAL_QUBITS):
+            for i in range(TOTAL_QUBITS):
+                match_status = "Discarded"
+        
+                # Check if bases match (Sifting)
+                if alice_bases[i] == bob_bases[i]:
+                    sifted_count += 1
+                    sifted_indices.append(i + 1) # Store Qubit Number (1-based)
+            
+                    if alice_bits[i] == bob_results[i]:
+                        match_status = "YES"
+                        running_errors.append(0) # No error
+                    else:
+                        match_status = "ERROR"
+                        total_errors += 1
+                        running_errors.append(1) # Error occurred
+        
+                # Print first 15 rows to keep console clean (but processes 1000)
+                if i < 15:
+                    # Using raw 0/1 integers as requested in "like the first one"
+                    print(f"{i+1:<5} {alice_bits[i]:<10} {alice_bases[i]:<10} {bob_bases[i]:<10} {bob_results[i]:<10} {match_status}")
+
+        print("... (showing first 15 rows only, processed 1000) ...")
+        print("-" * 65)
+
+        if sifted_count == 0:
+            print("No matches found.")
+            return
+
+        # 6. FINAL STATISTICS
+        final_qber = total_errors / sifted_count
+        print(f"\nRESULTS:")
+        print(f"Total Qubits Sent: {TOTAL_QUBITS}")
+        print(f"Sifted Key Length: {sifted_count}")
+        print(f"Total Errors Found: {total_errors}")
+        print(f"Final QBER: {final_qber:.2%} (Theory predicts ~25%)")
+
+        # 7. GENERATE GRAPH (1000 Qubits)
+        with stage("plot"):
+            cumulative_errors = np.cumsum(running_errors)
+            trials = np.arange(1, len(cumulative_errors) + 1)
+            qber_curve = cumulative_errors / trials
+            plot_x, plot_y = downsample_curve(sifted_indices, qber_curve)  # fixed point budget
+    
+            plt.style.use('dark_background')
+            plt.figure(figsize=(10, 6))
+    
+            # Plot Simulated QBER
+            plt.plot(plot_x, plot_y, color='cyan', label='Simulated QBER', linewidth=1.5)
+    
+            # Plot Theoretical 25% Line
+            plt.axhline(y=0.25, color='red', linestyle='--', linewidth=2, label='Theoretical QBER = 25%')
+    
+            plt.title(f'Intercept-Resend Attack: QBER (Total Qubits: {TOTAL_QUBITS})', fontsize=14, color='white')
+            plt.xlabel('Number of Qubits', fontsize=12, color='white')
+            plt.ylabel('Quantum Bit Error Rate (QBER)', fontsize=12, color='white')
+    
+            plt.ylim(0, 0.5) 
+            plt.xlim(0, TOTAL_QUBITS) 
+    
+            plt.grid(True, color='gray', linestyle='--', alpha=0.5)
+            plt.legend(loc='upper right', facecolor='black', edgecolor='white')
+
+    print("\nStage timings:")
+    print(format_report(timer))
+
+    print("\nDisplaying graph...")
+    plt.tight_layout()
+    plt.show()
+
+if __name__ == "__main__":
+    run_simulation()
@@ -0,0 +1,146 @@
+import argparse
+
+import numpy as np
+
+from bb84.privacy import binary_entropy
+
+# -------------------------------
+# EAVESDROPPING ATTACKS
+# -------------------------------
+# Closed-form attack kernels in the style of NumpyEngine. Each takes
+# Alice's bits/bases and Bob's bases as whole arrays and returns what
+# reaches Bob, together with Eve's per-qubit information "eve_info" (bits
+# of mutual information with Alice's bit once the bases are announced).
+# Attack parameters broadcast against the qubit arrays. A parameter of
+# shape (k, 1) against qubits of shape (n,) therefore simulates k
+# settings x n qubits in one pass (see sweep_attack).
+
+BREIDBART_P = np.cos(np.pi / 8) ** 2  # P(Eve's Breidbart outcome = Alice's bit), ~0.854
+
+
+def _random_bits(rng, shape):
+    return rng.integers(0, 2, shape, dtype=np.uint8)
+
+
+def _measure(rng, bits, prep_bases, measure_bases):
+    """Z/X measurement: the bit survives when bases agree, else a fair coin."""
+    return np.where(prep_bases == measure_bases, bits, _random_bits(rng, np.shape(bits)))
+
+
+def intercept_resend(rng, alice_bits, alice_bases, bob_bases, fraction=1.0):
+    """Eve intercepts a random `fraction` of the qubits in a random Z/X basis and resends."""
+    shape = np.broadcast_shapes(np.shape(alice_bits), np.shape(fraction))
+    alice_bits, alice_bases, bob_bases = (np.broadcast_to(a, shape) for a in (alice_bits, alice_bases, bob_bases))
+    tapped = rng.random(shape) < fraction
+    eve_bases = _random_bits(rng, shape)
+    eve_bits = _measure(rng, alice_bits, alice_bases, eve_bases)
+    sent_bits = np.where(tapped, eve_bits, alice_bits)
+    sent_bases = np.where(tapped, eve_bases, alice_bases)
+    return {
+        "eve_bases": eve_bases,
+        "eve_bits": eve_bits,
+        "bob_bits": _measure(rng, sent_bits, sent_bases, bob_bases),
+        "detected": np.ones(shape, dtype=bool),
+        # A right basis gives Eve the bit; a wrong one leaves her guessing
+        "eve_info": (tapped & (eve_bases == alice_bases)).astype(np.float64),
+    }
+
+
+def breidbart(rng, alice_bits, alice_bases, bob_bases, fraction=1.0):
+    """Eve measures a `fraction` of the qubits in the Breidbart basis (halfway between Z and X) and resends."""
+    shape = np.broadcast_shapes(np.shape(alice_bits), np.shape(fraction))
+    alice_bits, alice_bases, bob_bases = (np.broadcast_to(a, shape) for a in (alice_bits, alice_bases, bob_bases))
+    tapped = rng.random(shape) < fraction
+    # Either basis gives Eve the right bit with cos^2(pi/8), and Bob reads
+    # her resent Breidbart state as her bit with the same probability
+    eve_bits = np.where(rng.random(shape) < BREIDBART_P, alice_bits, 1 - alice_bits).astype(np.uint8)
+    resent = np.where(rng.random(shape) < BREIDBART_P, eve_bits, 1 - eve_bits).astype(np.uint8)
+    return {
+        "eve_bases": None,
+        "eve_bits": eve_bits,
+        "bob_bits": np.where(tapped, resent, _measure(rng, alice_bits, alice_bases, bob_bases)),
+        "detected": np.ones(shape, dtype=bool),
+        "eve_info": np.where(tapped, 1 - binary_entropy(BREIDBART_P), 0.0),
+    }
+
+
+def photon_number_splitting(rng, alice_bits, alice_bases, bob_bases, mu=0.1, block_single=0.0):
+    """
+    Weak coherent pulses with Poisson(mu) photons: Eve keeps one photon of
+    every multi-photon pulse and measures it after the bases are announced
+    (no errors, full information); she blocks a `block_single` share of the
+    single-photon pulses. Vacuum and blocked pulses never click.
+    """
+    shape = np.broadcast_shapes(np.shape(alice_bits), np.shape(mu), np.shape(block_single))
+    alice_bits, alice_bases, bob_bases = (np.broadcast_to(a, shape) for a in (alice_bits, alice_bases, bob_bases))
+    photons = rng.poisson(np.broadcast_to(mu, shape))
+    multi = photons >= 2
+    blocked = (photons == 1) & (rng.random(shape) < block_single)
+    eve_bases = np.where(multi, alice_bases, _random_bits(rng, shape))
+    return {
+        "eve_bases": eve_bases,
+        "eve_bits": _measure(rng, alice_bits, alice_bases, eve_bases),
+        "bob_bits": _measure(rng, alice_bits, alice_bases, bob_bases),
+        "detected": (photons >= 1) & ~blocked,
+        "eve_info": multi.astype(np.float64),
+    }
+
+
+ATTACKS = {
+    "intercept-resend": intercept_resend,
+    "breidbart": breidbart,
+    "pns": photon_number_splitting,
+}
+
+
+def attack_stats(alice_bits, alice_bases, bob_bases, result):
+    """QBER and Eve's information per sifted bit, reduced over the last axis."""
+    sifted = (alice_bases == bob_bases) & result["detected"]
+    n_sifted = np.count_nonzero(sifted, axis=-1)
+    errors = np.count_nonzero(sifted & (alice_bits != result["bob_bits"]), axis=-1)
+    info = np.where(sifted, result["eve_info"], 0.0).sum(axis=-1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return {
+            "sifted": n_sifted,
+            "qber": np.where(n_sifted > 0, errors / n_sifted, 1.0),
+            "eve_info": np.where(n_sifted > 0, info / n_sifted, 0.0),
+        }
+
+
+def sweep_attack(name, n_qubits, seed=None, **params):
+    """
+    Run attack `name` for every value of one or more parameter arrays in a
+    single vectorized pass; the same Alice/Bob qubits are used for every
+    setting. Returns the parameter grid with QBER and Eve's information.
+    """
+    rng = np.random.default_rng(seed)
+    alice_bits = _random_bits(rng, n_qubits)
+    alice_bases = _random_bits(rng, n_qubits)
+    bob_bases = _random_bits(rng, n_qubits)
+    grid = {key: np.asarray(value, dtype=np.float64).reshape(-1, 1) for key, value in params.items()}
+    result = ATTACKS[name](rng, alice_bits, alice_bases, bob_bases, **grid)
+    stats = attack_stats(alice_bits, alice_bases, bob_bases, result)
+    return {**{key: value.ravel() for key, value in grid.items()}, **stats}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Sweep QBER against Eve's information for an attack.")
+    parser.add_argument("attack", choices=list(ATTACKS))
+    parser.add_argument("--qubits", type=lambda s: int(float(s)), default=100_000)
+    parser.add_argument("--points", type=int, default=11)
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args(argv)
+
+    if args.attack == "pns":
+        params = {"mu": np.linspace(0.05, 1.0, args.points)}
+    else:
+        params = {"fraction": np.linspace(0.0, 1.0, args.points)}
+    result = sweep_attack(args.attack, args.qubits, args.seed, **params)
+    (param,) = params
+    print(f"{param:>10} {'QBER':>8} {'Eve info':>9} {'Sifted':>9}")
+    for value, qber, info, sifted in zip(result[param], result["qber"], result["eve_info"], result["sifted"]):
+        print(f"{value:>10.3f} {qber:>8.2%} {info:>9.3f} {sifted:>9}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,194 @@
+import argparse
+import itertools
+import json
+import platform
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+from bb84.crypto import pack_key, xor_bytes
+from bb84.engine import NumpyEngine, sift
+
+# -------------------------------
+# BENCHMARK SUITE
+# -------------------------------
+# Every implementation is split into the same protocol stages; each stage
+# is timed (best of --repeat) and then run once more under tracemalloc
+# for its peak memory. Reports are JSON, and an earlier report can be
+# passed back as --baseline to flag regressions.
+
+STAGES = ("encode", "eve", "measure", "sift", "qber", "encrypt")
+DEFAULT_SIZES = [10**k for k in range(2, 8)]
+REGRESSION_TOLERANCE = 0.25  # fractional slowdown that counts as a regression
+MIN_REGRESSION_SECONDS = 1e-3  # ignore slowdowns below timer noise
+
+
+def _numpy_impl(engine):
+    def prepare(bits, bases):
+        return bits, bases
+
+    def measure(prepared, measure_bases):
+        return engine.measure(*prepared, measure_bases)
+    return prepare, measure
+
+
+def _aer_impl(mode):
+    def factory(engine):
+        from bb84 import aer  # imported and warmed here, outside the timed stages
+
+        for key in itertools.product((0, 1), repeat=3):
+            aer.cached_circuit(*key)
+        if mode == "cached":
+            # One cached circuit per class; preparing is just pairing bits with bases
+            return _numpy_impl(engine)[0], lambda prepared, measure_bases: aer.measure_classes(*prepared, measure_bases)
+
+        def measure(circuits, measure_bases):
+            return np.asarray(aer.measure_qubits(circuits, measure_bases, mode=mode), dtype=np.uint8)
+        return aer.encode_qubits, measure
+    return factory
+
+
+# name -> (largest qubit count worth running, factory of (prepare, measure))
+IMPLEMENTATIONS = {
+    "numpy": (10**7, _numpy_impl),
+    "aer-cached": (10**6, _aer_impl("cached")),
+    "aer-batched": (10**4, _aer_impl("batched")),
+    "aer-sequential": (10**2, _aer_impl("sequential")),
+}
+
+
+def protocol_stages(n, impl, engine):
+    """
+    The BB84 pipeline as (stage, callable) pairs sharing one state dict.
+    impl is an implementation's (prepare, measure) pair: "encode" includes
+    preparing Alice's qubits (e.g. building circuits) and "eve" includes
+    preparing the qubits she resends.
+    """
+    prepare, measure = impl
+    state = {}
+
+    def encode():
+        state["alice_bits"] = engine.random_bits(n)
+        state["alice_bases"] = engine.random_bits(n)
+        state["bob_bases"] = engine.random_bits(n)
+        state["alice_qubits"] = prepare(state["alice_bits"], state["alice_bases"])
+
+    def eve():
+        state["eve_bases"] = engine.random_bits(n)
+        state["eve_bits"] = np.asarray(measure(state["alice_qubits"], state["eve_bases"]), dtype=np.uint8)
+        state["eve_qubits"] = prepare(state["eve_bits"], state["eve_bases"])
+
+    def bob():
+        state["bob_bits"] = np.asarray(measure(state["eve_qubits"], state["bob_bases"]), dtype=np.uint8)
+        state["detected"] = np.ones(n, dtype=bool)
+
+    def sifting():
+        state["alice_key"], state["bob_key"], _ = sift(state)
+
+    def qber():
+        state["qber"] = np.count_nonzero(state["alice_key"] != state["bob_key"]) / max(len(state["alice_key"]), 1)
+
+    def encrypt():
+        key = pack_key(state["alice_key"])
+        state["ciphertext"] = xor_bytes(bytes(len(key)), key)
+
+    return list(zip(STAGES, (encode, eve, bob, sifting, qber, encrypt)))
+
+
+def run_benchmark(impl, n, repeat=3, seed=0):
+    """Time every stage of one implementation at one qubit count."""
+    max_n, impl_factory = IMPLEMENTATIONS[impl]
+    if n > max_n:
+        return []
+
+    timings = {stage: float("inf") for stage in STAGES}
+    for _ in range(repeat):
+        engine = NumpyEngine(seed)
+        for stage, func in protocol_stages(n, impl_factory(engine), engine):
+            start = time.perf_counter()
+            func()
+            timings[stage] = min(timings[stage], time.perf_counter() - start)
+
+    peaks = {}
+    engine = NumpyEngine(seed)
+    tracemalloc.start()
+    for stage, func in protocol_stages(n, impl_factory(engine), engine):
+        tracemalloc.reset_peak()
+        before = tracemalloc.get_traced_memory()[0]
+        func()
+        peaks[stage] = tracemalloc.get_traced_memory()[1] - before
+    tracemalloc.stop()
+
+    return [
+        {
+            "impl": impl,
+            "qubits": n,
+            "stage": stage,
+            "seconds": timings[stage],
+            "qubits_per_s": n / timings[stage] if timings[stage] > 0 else None,
+            "peak_bytes": peaks[stage],
+        }
+        for stage in STAGES
+    ]
+
+
+def find_regressions(results, baseline, tolerance=REGRESSION_TOLERANCE):
+    """Rows whose time grew by more than tolerance against the baseline."""
+    previous = {(r["impl"], r["qubits"], r["stage"]): r for r in baseline["results"]}
+    regressions = []
+    for row in results:
+        old = previous.get((row["impl"], row["qubits"], row["stage"]))
+        if old is None:
+            continue
+        slowdown = row["seconds"] - old["seconds"]
+        if slowdown > MIN_REGRESSION_SECONDS and row["seconds"] > old["seconds"] * (1 + tolerance):
+            regressions.append({**row, "baseline_seconds": old["seconds"]})
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the BB84 protocol stages.")
+    parser.add_argument("--sizes", type=lambda s: int(float(s)), nargs="+", default=DEFAULT_SIZES, help="e.g. 100 1e7")
+    parser.add_argument("--impl", nargs="+", choices=list(IMPLEMENTATIONS), default=list(IMPLEMENTATIONS))
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--output", help="write the JSON report here")
+    parser.add_argument("--baseline", help="earlier JSON report to compare against")
+    parser.add_argument("--tolerance", type=float, default=REGRESSION_TOLERANCE)
+    args = parser.parse_args(argv)
+
+    results = []
+    for impl in args.impl:
+        for n in args.sizes:
+            rows = run_benchmark(impl, n, args.repeat)
+            for row in rows:
+                print(f"{impl:<15} {n:>10} {row['stage']:<8} {row['seconds'] * 1e3:>10.3f} ms "
+                      f"{row['peak_bytes'] / 2**20:>9.2f} MiB")
+            results.extend(rows)
+
+    report = {
+        "meta": {
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        },
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = find_regressions(results, json.load(f), args.tolerance)
+        for row in regressions:
+            print(f"REGRESSION {row['impl']} {row['qubits']} {row['stage']}: "
+                  f"{row['baseline_seconds'] * 1e3:.3f} ms -> {row['seconds'] * 1e3:.3f} ms")
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+import sys
+import time
+
+import numpy as np
+
+from bb84.crypto import pack_key, pack_with_carry
+
+# -------------------------------
+# BIT-SLICED SIMULATION
+# -------------------------------
+# 64 qubits per uint64 word: bits, bases and outcomes of one word are
+# handled by a single bitwise instruction. Random words come straight from
+# Generator.bytes, basis agreement is XNOR, a mismatched basis substitutes
+# a random word under a mask, and errors are counted with popcount. Work
+# is done in chunks, so memory is bounded by the chunk plus the packed key.
+
+CHUNK_WORDS = 1 << 16  # 4M qubits per chunk
+
+if hasattr(np, "bitwise_count"):  # NumPy >= 2.0
+    def popcount(words):
+        return int(np.bitwise_count(words).sum(dtype=np.int64))
+else:
+    _BYTE_COUNTS = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+    def popcount(words):
+        return int(_BYTE_COUNTS[words.view(np.uint8)].sum(dtype=np.int64))
+
+
+def random_words(rng, n_words):
+    return np.frombuffer(rng.bytes(n_words * 8), dtype=np.uint64)
+
+
+def measure_words(bits, prep_bases, measure_bases, random):
+    """Keep the bit where the bases agree (XNOR), else the random bit."""
+    agree = ~(prep_bases ^ measure_bases)
+    return (agree & bits) | (~agree & random)
+
+
+def unpack_words(words):
+    """0/1 array of the bits in a word array (bit 0 of word 0 first)."""
+    return np.unpackbits(words.view(np.uint8), bitorder="little")
+
+
+def tail_mask(n_words, n_bits):
+    """All-ones words except for the bits past n_bits in the last word."""
+    mask = np.full(n_words, np.uint64(0xFFFFFFFFFFFFFFFF))
+    if n_bits % 64:
+        mask[-1] = np.uint64((1 << (n_bits % 64)) - 1)
+    return mask
+
+
+class _PackedBits:
+    """Appends variable-length 0/1 runs into one np.packbits buffer."""
+
+    def __init__(self):
+        self.parts = []
+        self.carry = np.empty(0, dtype=np.uint8)
+
+    def add(self, bits):
+        packed, self.carry = pack_with_carry(self.carry, bits)
+        self.parts.append(packed)
+
+    def finish(self):
+        return np.concatenate(self.parts + [pack_key(self.carry)])
+
+
+def simulate_packed(n_qubits, eve=False, seed=None, keep_key=True, chunk_words=CHUNK_WORDS):
+    """
+    Bit-sliced BB84 run of n_qubits (Eve: full intercept-resend).
+    The sifted keys come back packed in the bb84.crypto.pack_key layout,
+    so they feed xor_bytes directly; keep_key=False only counts.
+    """
+    rng = np.random.default_rng(seed)
+    sifted = errors = eve_right = 0
+    alice_key, bob_key = _PackedBits(), _PackedBits()
+
+    for start in range(0, n_qubits, chunk_words * 64):
+        n_bits = min(chunk_words * 64, n_qubits - start)
+        n_words = -(-n_bits // 64)
+
+        alice_bits = random_words(rng, n_words)
+        alice_bases = random_words(rng, n_words)
+        bob_bases = random_words(rng, n_words)
+        sent_bits, sent_bases = alice_bits, alice_bases
+        if eve:
+            eve_bases = random_words(rng, n_words)
+            sent_bits = measure_words(alice_bits, alice_bases, eve_bases, random_words(rng, n_words))
+            sent_bases = eve_bases
+        bob_bits = measure_words(sent_bits, sent_bases, bob_bases, random_words(rng, n_words))
+
+        sift_mask = ~(alice_bases ^ bob_bases) & tail_mask(n_words, n_bits)
+        sifted += popcount(sift_mask)
+        errors += popcount((alice_bits ^ bob_bits) & sift_mask)
+        if eve:
+            eve_right += popcount(~(alice_bases ^ eve_bases) & sift_mask)
+
+        if keep_key:
+            keep = unpack_words(sift_mask).astype(bool)
+            alice_key.add(unpack_words(alice_bits)[keep])
+            bob_key.add(unpack_words(bob_bits)[keep])
+
+    return {
+        "qubits": n_qubits,
+        "sifted": sifted,
+        "errors": errors,
+        "qber": errors / sifted if sifted else 1.0,
+        "eve_info": eve_right / sifted if sifted else 0.0,  # Eve's basis matched Alice's
+        "alice_key": alice_key.finish() if keep_key else None,
+        "bob_key": bob_key.finish() if keep_key else None,
+    }
+
+
+if __name__ == "__main__":
+    total = int(float(sys.argv[1])) if len(sys.argv) > 1 else 10**8
+    for eve_present in (False, True):
+        start = time.perf_counter()
+        result = simulate_packed(total, eve=eve_present, keep_key=False)
+        elapsed = time.perf_counter() - start
+        print(f"Eve present: {eve_present}  qubits: {total:,}  sifted: {result['sifted']:,}  "
+              f"QBER: {result['qber']:.4%}  time: {elapsed:.2f}s ({total / elapsed / 1e6:.1f} M qubits/s)")
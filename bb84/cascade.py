@@ -0,0 +1,138 @@
+import numpy as np
+
+# -------------------------------
+# CASCADE ERROR CORRECTION
+# -------------------------------
+# Bob fixes his sifted key against Alice's using only parity questions.
+# The protocol is written as a generator so the same code can run against
+# a local copy of Alice's key (reconcile) or over a real classical channel:
+# every yielded (pass_no, starts, ends) request is one round trip, and the
+# caller sends back Alice's parities of key[perm[start:end]] for each range.
+
+N_PASSES = 6
+MIN_BLOCK_SIZE = 4
+# Every pass splits the key into at least this many blocks. Without the cap
+# the doubling block size outgrows short keys (a few thousand bits) after
+# two passes, and a single whole-key parity never sees an even error count.
+MIN_BLOCKS = 4
+
+
+def initial_block_size(n, qber):
+    """Standard Cascade choice k1 ~ 0.73 / QBER, clipped to the key length."""
+    if qber <= 0:
+        return max(n, 1)
+    return int(min(max(np.ceil(0.73 / qber), MIN_BLOCK_SIZE), max(n, 1)))
+
+
+def cascade_permutations(n, n_passes=N_PASSES, seed=None):
+    """Public shuffles for each pass (the first pass uses the natural order)."""
+    rng = np.random.default_rng(seed)
+    perms = [np.arange(n)]
+    for _ in range(n_passes - 1):
+        perms.append(rng.permutation(n))
+    return perms
+
+
+def range_parities(key, perm, starts, ends):
+    """Parities of key[perm[s:e]] for many ranges at once."""
+    lengths = ends - starts
+    offsets = np.cumsum(lengths) - lengths
+    total = int(lengths.sum())
+    if total == 0:
+        return np.zeros(len(starts), dtype=np.uint8)
+    # Flat gather of every range back to back, then one segmented sum
+    idx = np.repeat(starts - offsets, lengths) + np.arange(total)
+    values = key[perm[idx]].astype(np.int64)
+    return (np.add.reduceat(values, offsets) & 1).astype(np.uint8)
+
+
+def cascade_steps(bob_key, qber, perms):
+    """
+    Cascade on Bob's side, as a generator:
+    1. Each pass asks for Alice's block parities over its shuffled order
+    2. All odd blocks of a pass are binary-searched in parallel
+    3. Every corrected bit flips the parity of its block in earlier passes,
+       which reopens those blocks until no pass has an odd block left
+    Returns a dict with the corrected key, bits leaked and round trips.
+    """
+    bob = np.array(bob_key, dtype=np.uint8)
+    n = len(bob)
+    leaked = 0
+    round_trips = 0
+    corrected = 0
+
+    block_sizes = []
+    inv_perms = []
+    alice_parities = []
+    bob_parities = []
+
+    max_block_size = max(-(-n // MIN_BLOCKS), 1)
+    block_size = min(initial_block_size(n, qber), max_block_size)
+    for pass_no, perm in enumerate(perms if n else []):
+        starts = np.arange(0, n, block_size)
+        ends = np.minimum(starts + block_size, n)
+        alice_par = yield pass_no, starts, ends
+        leaked += len(starts)
+        round_trips += 1
+
+        inv_perm = np.empty(n, dtype=np.int64)
+        inv_perm[perm] = np.arange(n)
+        block_sizes.append(block_size)
+        inv_perms.append(inv_perm)
+        alice_parities.append(np.asarray(alice_par, dtype=np.uint8))
+        bob_parities.append(range_parities(bob, perm, starts, ends))
+
+        while True:
+            odd_pass = next(
+                (j for j in range(pass_no, -1, -1) if np.any(alice_parities[j] != bob_parities[j])),
+                None,
+            )
+            if odd_pass is None:
+                break
+
+            # Parallel binary search over every odd block of that pass
+            j = odd_pass
+            odd_blocks = np.flatnonzero(alice_parities[j] != bob_parities[j])
+            s = odd_blocks * block_sizes[j]
+            e = np.minimum(s + block_sizes[j], n)
+            while True:
+                active = np.flatnonzero(e - s > 1)
+                if len(active) == 0:
+                    break
+                sa, ea = s[active], e[active]
+                mid = (sa + ea) // 2
+                alice_half = yield j, sa, mid
+                leaked += len(active)
+                round_trips += 1
+                in_left = np.asarray(alice_half, dtype=np.uint8) != range_parities(bob, perms[j], sa, mid)
+                e[active] = np.where(in_left, mid, ea)
+                s[active] = np.where(in_left, sa, mid)
+
+            positions = perms[j][s]
+            bob[positions] ^= 1
+            corrected += len(positions)
+            for k in range(pass_no + 1):
+                np.bitwise_xor.at(bob_parities[k], inv_perms[k][positions] // block_sizes[k], 1)
+
+        block_size = min(block_size * 2, max_block_size)
+
+    return {
+        "key": bob,
+        "bits_leaked": leaked,
+        "round_trips": round_trips,
+        "corrected": corrected,
+    }
+
+
+def reconcile(alice_key, bob_key, qber, n_passes=N_PASSES, seed=None):
+    """Run Cascade locally, answering Bob's parity questions from Alice's key."""
+    alice_key = np.asarray(alice_key, dtype=np.uint8)
+    perms = cascade_permutations(len(alice_key), n_passes, seed)
+    steps = cascade_steps(bob_key, qber, perms)
+    answer = None
+    try:
+        while True:
+            pass_no, starts, ends = steps.send(answer)
+            answer = range_parities(alice_key, perms[pass_no], starts, ends)
+    except StopIteration as stop:
+        return stop.value
@@ -0,0 +1,52 @@
+from dataclasses import dataclass
+
+import numpy as np
+
+from bb84.engine import run_protocol, sift
+
+# -------------------------------
+# PHYSICAL CHANNEL MODEL
+# -------------------------------
+# Sits between the sender (Alice, or Eve when she resends) and Bob's
+# detectors. Loss, detector efficiency and dark counts are classical
+# click/no-click events and are always sampled as NumPy masks; the
+# depolarization is a NumPy mask in the analytic engine and an Aer
+# NoiseModel in the Qiskit engine.
+
+
+@dataclass(frozen=True)
+class ChannelModel:
+    length_km: float = 0.0
+    loss_db_per_km: float = 0.2  # standard telecom fiber at 1550 nm
+    depolarization: float = 0.0  # probability the qubit is replaced by a random state
+    detector_efficiency: float = 1.0
+    dark_count_prob: float = 0.0  # per detection window
+
+    @property
+    def transmittance(self):
+        """Probability that a sent photon produces a click at Bob."""
+        return 10 ** (-self.loss_db_per_km * self.length_km / 10) * self.detector_efficiency
+
+    def apply(self, outcomes, rng, depolarize=True):
+        """Turn ideal outcomes into (observed bits, detected mask)."""
+        n = len(outcomes)
+        outcomes = np.asarray(outcomes, dtype=np.uint8)
+        clicked = rng.random(n) < self.transmittance
+        noisy = ~clicked & (rng.random(n) < self.dark_count_prob)
+        if depolarize and self.depolarization > 0:
+            noisy |= clicked & (rng.random(n) < self.depolarization)
+        # A dark count or a depolarized qubit gives a uniformly random bit
+        observed = np.where(noisy, rng.integers(0, 2, n, dtype=np.uint8), outcomes)
+        return observed, clicked | noisy
+
+
+def link_budget(channel, pulses=10**7, engine=None, seed=None):
+    """Detection rate, sifted-key rate per pulse and QBER of a link."""
+    transmission = run_protocol(pulses, engine=engine, seed=seed, channel=channel)
+    alice_key, bob_key, _ = sift(transmission)
+    return {
+        "pulses": pulses,
+        "detection_rate": np.count_nonzero(transmission["detected"]) / pulses,
+        "sifted_rate": len(alice_key) / pulses,
+        "qber": np.count_nonzero(alice_key != bob_key) / len(alice_key) if len(alice_key) > 0 else 1.0,
+    }
@@ -0,0 +1,226 @@
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+from functools import partial
+
+import numpy as np
+
+from bb84.attacks import ATTACKS
+from bb84.channel import ChannelModel
+from bb84.engine import ENGINES, QBER_THRESHOLD, get_engine, run_protocol, sift
+from bb84.profiling import profiled, stage
+
+# -------------------------------
+# HEADLESS BATCH CLI
+# -------------------------------
+# One non-interactive run per invocation: everything comes from the
+# command line and the result goes to a JSON, CSV or NPZ file (picked by
+# the extension of --output, or --format). Only NumPy is imported up
+# front; the qiskit engine loads Aer on first use and matplotlib is
+# imported only when --plot asks for a chart.
+
+FORMATS = ("json", "csv", "npz")
+SUMMARY_FIELDS = (
+    "qubits", "engine", "eve", "seed", "length_km", "depolarization", "detected", "sifted", "errors",
+    "qber", "eve_info", "threshold", "accepted", "seconds", "qubits_per_s",
+)
+
+
+def attack_from_args(name, fraction=1.0, mu=0.1, block_single=0.0):
+    """run_protocol's eve argument for an --eve choice and its parameters."""
+    if name == "none":
+        return False
+    if name == "intercept-resend" and fraction >= 1.0:
+        return True  # full attack through the engine, so Aer modes apply too
+    if name == "pns":
+        return partial(ATTACKS[name], mu=mu, block_single=block_single)
+    return partial(ATTACKS[name], fraction=fraction)
+
+
+def simulate(n_qubits, engine="numpy", eve=False, seed=None, channel=None, mode="cached"):
+    """One run; returns the per-qubit arrays plus a summary dict."""
+    if engine == "bitslice":
+        from bb84.bitslice import simulate_packed
+
+        if channel is not None:
+            raise ValueError("The bitslice engine has no channel model")
+        if callable(eve):
+            raise ValueError("The bitslice engine only models full intercept-resend")
+        with stage("bitslice", n_qubits):
+            result = simulate_packed(n_qubits, eve=eve, seed=seed)
+        arrays = {"alice_key": result["alice_key"], "bob_key": result["bob_key"]}
+        detected = n_qubits
+        sifted, errors = result["sifted"], result["errors"]
+        eve_info = result["eve_info"]
+    else:
+        options = {"mode": mode} if engine == "qiskit" else {}
+        transmission = run_protocol(n_qubits, eve=eve, engine=get_engine(engine, seed, **options), channel=channel)
+        alice_key, bob_key, indices = sift(transmission)
+        arrays = {name: value for name, value in transmission.items() if value is not None}
+        arrays["sifted_indices"] = indices
+        detected = int(np.count_nonzero(transmission["detected"]))
+        sifted = len(alice_key)
+        with stage("qber", sifted):
+            errors = int(np.count_nonzero(alice_key != bob_key))
+        if transmission["eve_info"] is not None:
+            eve_info = float(transmission["eve_info"][indices].mean()) if sifted else 0.0
+        elif eve:
+            eve_info = float(np.mean(transmission["eve_bases"][indices] == transmission["alice_bases"][indices]))
+        else:
+            eve_info = 0.0
+
+    summary = {
+        "qubits": n_qubits,
+        "engine": engine,
+        "eve": eve,
+        "seed": seed,
+        "length_km": channel.length_km if channel else 0.0,
+        "depolarization": channel.depolarization if channel else 0.0,
+        "detected": detected,
+        "sifted": sifted,
+        "errors": errors,
+        "qber": errors / sifted if sifted else 1.0,
+        "eve_info": eve_info,  # Eve's bits of information per sifted bit
+    }
+    return arrays, summary
+
+
+def error_curve(arrays):
+    """(x, 0/1 error per sifted bit) for the running-QBER chart."""
+    if "sifted_indices" in arrays:
+        idx = arrays["sifted_indices"]
+        return idx + 1, arrays["alice_bits"][idx] != arrays["bob_bits"][idx]
+    errors = np.unpackbits(arrays["alice_key"] ^ arrays["bob_key"])
+    return np.arange(1, len(errors) + 1), errors
+
+
+def save_plot(path, arrays, summary):
+    import matplotlib
+
+    matplotlib.use("Agg")  # headless nodes have no display
+    import matplotlib.pyplot as plt
+
+    from bb84.plotting import RunningQberCurve
+
+    x, errors = error_curve(arrays)
+    curve = RunningQberCurve()
+    curve.add(x, errors)
+
+    fig, ax = plt.subplots(figsize=(9, 4.5))
+    ax.plot(curve.x, curve.y, linewidth=1.5, label="Simulated QBER")
+    ax.axhline(y=summary["threshold"], color="#f59e0b", linestyle="--", label="Threshold")
+    ax.set_title(f"Running QBER ({summary['qubits']:,} qubits, engine {summary['engine']}, Eve {summary['eve']})")
+    ax.set_xlabel("Qubit index" if "sifted_indices" in arrays else "Sifted bit")
+    ax.set_ylabel("QBER")
+    ax.set_ylim(0, 0.5)
+    ax.grid(alpha=0.3)
+    ax.legend()
+    fig.savefig(path, dpi=100, bbox_inches="tight")
+    plt.close(fig)
+
+
+def csv_header(path):
+    """Column names of an existing CSV file, or None when there is no file yet."""
+    if not os.path.exists(path) or os.path.getsize(path) == 0:
+        return None
+    with open(path, newline="") as f:
+        return next(csv.reader(f), None)
+
+
+def check_csv_columns(path):
+    """Raise ValueError if an existing CSV file has other columns than SUMMARY_FIELDS."""
+    header = csv_header(path)
+    if header is not None and header != list(SUMMARY_FIELDS):
+        raise ValueError(
+            f"{path} has the columns {header}, not {list(SUMMARY_FIELDS)}; write to a new file instead of appending"
+        )
+
+
+def write_output(path, fmt, arrays, summary, stages):
+    if fmt == "json":
+        with open(path, "w") as f:
+            json.dump({"summary": summary, "stages": stages}, f, indent=2)
+    elif fmt == "csv":
+        # One row per run; with an existing file the row is appended, so
+        # many invocations build up one table (as long as the columns match)
+        check_csv_columns(path)
+        exists = csv_header(path) is not None
+        with open(path, "a", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=SUMMARY_FIELDS)
+            if not exists:
+                writer.writeheader()
+            writer.writerow(summary)
+    else:
+        np.savez_compressed(path, **arrays, summary=json.dumps(summary))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run one BB84 simulation without any interaction.")
+    parser.add_argument("--qubits", type=lambda s: int(float(s)), default=10_000, help="e.g. 350 or 1e7")
+    parser.add_argument("--engine", choices=[*ENGINES, "bitslice"], default="numpy")
+    parser.add_argument("--mode", choices=["cached", "batched", "dynamic", "sequential"], default="cached",
+                        help="measurement mode of the qiskit engine")
+    parser.add_argument("--eve", choices=["none", *ATTACKS], default="none")
+    parser.add_argument("--fraction", type=float, default=1.0, help="share of qubits Eve intercepts")
+    parser.add_argument("--mu", type=float, default=0.1, help="mean photons per pulse (pns)")
+    parser.add_argument("--block-single", type=float, default=0.0, help="share of single-photon pulses Eve blocks (pns)")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--length-km", type=float, default=0.0)
+    parser.add_argument("--depolarization", type=float, default=0.0)
+    parser.add_argument("--threshold", type=float, default=QBER_THRESHOLD)
+    parser.add_argument("--output", "-o", help="result file; .json, .csv or .npz (default: JSON on stdout)")
+    parser.add_argument("--format", choices=FORMATS, help="override the format implied by --output")
+    parser.add_argument("--plot", help="also save the running-QBER chart to this image file")
+    args = parser.parse_args(argv)
+
+    fmt = args.format or (os.path.splitext(args.output)[1].lstrip(".").lower() if args.output else "json")
+    if fmt not in FORMATS:
+        parser.error(f"cannot infer the output format from {args.output!r}; pass --format")
+    if fmt == "npz" and not args.output:
+        parser.error("NPZ output needs --output")
+    if fmt == "csv" and args.output:
+        try:
+            check_csv_columns(args.output)  # before the run rather than after it
+        except ValueError as exc:
+            parser.error(str(exc))
+    if args.engine == "bitslice":
+        # simulate() would raise on these; fail before the run with a usage error
+        if args.length_km or args.depolarization:
+            parser.error("--engine bitslice has no channel model; drop --length-km/--depolarization")
+        if callable(attack_from_args(args.eve, args.fraction, args.mu, args.block_single)):
+            parser.error("--engine bitslice only models full intercept-resend (--eve intercept-resend --fraction 1)")
+    channel = None
+    if args.length_km or args.depolarization:
+        channel = ChannelModel(length_km=args.length_km, depolarization=args.depolarization)
+
+    start = time.perf_counter()
+    with profiled("cli") as timer:
+        eve = attack_from_args(args.eve, args.fraction, args.mu, args.block_single)
+        arrays, summary = simulate(args.qubits, args.engine, eve, args.seed, channel, args.mode)
+    elapsed = time.perf_counter() - start
+    summary.update(
+        eve=args.eve,
+        threshold=args.threshold,
+        accepted=summary["sifted"] > 0 and summary["qber"] <= args.threshold,
+        seconds=elapsed,
+        qubits_per_s=args.qubits / elapsed if elapsed > 0 else None,
+    )
+
+    if args.output:
+        write_output(args.output, fmt, arrays, summary, timer.report())
+    elif fmt == "csv":
+        writer = csv.DictWriter(sys.stdout, fieldnames=SUMMARY_FIELDS)
+        writer.writeheader()
+        writer.writerow(summary)
+    else:
+        json.dump({"summary": summary, "stages": timer.report()}, sys.stdout, indent=2)
+        print()
+    if args.plot:
+        save_plot(args.plot, arrays, summary)
+
+
+if __name__ == "__main__":
+    main()
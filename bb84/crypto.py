@@ -0,0 +1,75 @@
+import hashlib
+import os
+
+import numpy as np
+
+# -------------------------------
+# ONE-TIME PAD ON PACKED KEYS
+# -------------------------------
+# Messages are handled as UTF-8 bytes and keys as packed bit buffers
+# (8 key bits per byte, first bit in the most significant position), so a
+# message of n bytes consumes exactly 8n key bits.
+
+FILE_CHUNK_SIZE = 1 << 20  # bytes read per step by encrypt_file
+
+
+def pack_key(bits):
+    """Pack a 0/1 key array into a uint8 buffer."""
+    return np.packbits(np.asarray(bits, dtype=np.uint8))
+
+
+def pack_with_carry(carry, bits):
+    """
+    Pack carry + bits up to the last whole byte, for keys that arrive in
+    pieces. Returns the packed bytes and the leftover (< 8) bits, which go
+    in front of the next piece; pack_key(leftover) flushes the final byte.
+    """
+    bits = np.concatenate([carry, np.asarray(bits, dtype=np.uint8)])
+    whole = len(bits) // 8 * 8
+    return np.packbits(bits[:whole]), bits[whole:]
+
+
+def key_digest(bits):
+    """SHA-256 of a 0/1 key, exchanged to confirm both sides hold the same key."""
+    return hashlib.sha256(pack_key(bits).tobytes()).digest()
+
+
+def unpack_key(packed, n_bits=None):
+    """Inverse of pack_key, optionally trimmed to n_bits."""
+    return np.unpackbits(np.frombuffer(packed, dtype=np.uint8), count=n_bits)
+
+
+def xor_bytes(data, key):
+    """XOR data with the first len(data) bytes of a packed key."""
+    data = np.frombuffer(data, dtype=np.uint8)
+    key = np.frombuffer(key, dtype=np.uint8)
+    if len(key) < len(data):
+        raise ValueError(f"Key too short: {len(key)} bytes for {len(data)} bytes of data")
+    return np.bitwise_xor(data, key[: len(data)]).tobytes()
+
+
+def encrypt_text(text, key):
+    return xor_bytes(text.encode("utf-8"), key)
+
+
+def decrypt_text(ciphertext, key):
+    return xor_bytes(ciphertext, key).decode("utf-8")
+
+
+def encrypt_file(src_path, dst_path, key, chunk_size=FILE_CHUNK_SIZE):
+    """Encrypt (or decrypt) a file chunk by chunk. Returns the bytes written."""
+    key = np.frombuffer(key, dtype=np.uint8)
+    size = os.path.getsize(src_path)
+    if len(key) < size:  # checked up front so no partial output is left behind
+        raise ValueError(f"Key too short: {len(key)} bytes for {size} bytes of data")
+    offset = 0
+    with open(src_path, "rb") as src, open(dst_path, "wb") as dst:
+        while chunk := src.read(chunk_size):
+            dst.write(xor_bytes(chunk, key[offset : offset + len(chunk)]))
+            offset += len(chunk)
+    return offset
+
+
+def bytes_to_binary(data):
+    """'0'/'1' rendering of a few bytes, for display only."""
+    return "".join(format(byte, "08b") for byte in data)
@@ -0,0 +1,190 @@
+import numpy as np
+
+from bb84.profiling import stage
+
+# -------------------------------
+# SIMULATION ENGINES
+# -------------------------------
+# Bits and bases are arrays of 0/1 (basis 0 = Z, basis 1 = X), the same
+# convention as encode_qubits / measure_qubits in bb84/aer.py.
+
+QBER_THRESHOLD = 0.11  # above this sifted-key error rate a run is treated as eavesdropped
+
+
+class Engine:
+    """Common interface: random bit source + measurement of prepared bits."""
+
+    name = None
+
+    def __init__(self, seed=None):
+        self.rng = np.random.default_rng(seed)
+
+    def random_bits(self, n):
+        return self.rng.integers(0, 2, n, dtype=np.uint8)
+
+    def measure(self, bits, prep_bases, measure_bases):
+        """Outcomes of measuring qubits prepared as (bits, prep_bases)."""
+        raise NotImplementedError
+
+    def transmit(self, bits, prep_bases, measure_bases, channel):
+        """Measurement behind a ChannelModel: (outcomes, detected mask)."""
+        return channel.apply(self.measure(bits, prep_bases, measure_bases), self.rng)
+
+    def intercept_resend(self, bits, prep_bases, eve_bases, measure_bases):
+        """Eve measures and resends, then Bob measures: (eve_bits, bob_bits)."""
+        eve_bits = self.measure(bits, prep_bases, eve_bases)
+        return eve_bits, self.measure(eve_bits, eve_bases, measure_bases)
+
+
+class NumpyEngine(Engine):
+    """Closed-form backend: the bit survives when bases agree, else a fair coin."""
+
+    name = "numpy"
+
+    def measure(self, bits, prep_bases, measure_bases):
+        bits = np.asarray(bits, dtype=np.uint8)
+        agree = np.asarray(prep_bases) == np.asarray(measure_bases)
+        return np.where(agree, bits, self.random_bits(len(bits)))
+
+
+class QiskitEngine(Engine):
+    """Aer backend, used to cross-validate the analytic engine.
+
+    mode is a measure_qubits mode; "dynamic" also runs Eve's attack and
+    Bob's measurement as one batch of dynamic circuits. Every Aer run gets
+    a seed_simulator drawn from the engine's rng, so a seeded engine
+    reproduces its outcomes.
+    """
+
+    name = "qiskit"
+
+    def __init__(self, seed=None, mode="cached"):
+        super().__init__(seed)
+        self.mode = mode
+
+    def aer_seed(self):
+        return int(self.rng.integers(2**31))
+
+    def measure(self, bits, prep_bases, measure_bases):
+        from bb84 import aer  # qiskit is heavy and optional, load it on first use
+
+        if self.mode == "cached":
+            results = aer.measure_classes(bits, prep_bases, measure_bases, seed_simulator=self.aer_seed())
+        else:
+            circuits = aer.encode_qubits(bits, prep_bases)
+            results = aer.measure_qubits(circuits, measure_bases, mode=self.mode, seed_simulator=self.aer_seed())
+        return np.asarray(results, dtype=np.uint8)
+
+    def transmit(self, bits, prep_bases, measure_bases, channel):
+        from bb84 import aer
+
+        if channel.depolarization <= 0:
+            return super().transmit(bits, prep_bases, measure_bases, channel)
+        # Depolarization is simulated by Aer; only clicks are sampled here
+        noise_model = aer.depolarizing_noise_model(channel.depolarization)
+        if self.mode == "cached":
+            results = aer.measure_classes(
+                bits, prep_bases, measure_bases, noise_model=noise_model, seed_simulator=self.aer_seed()
+            )
+        else:
+            circuits = aer.encode_qubits(bits, prep_bases)
+            results = aer.measure_qubits(
+                circuits, measure_bases, mode=self.mode, noise_model=noise_model, seed_simulator=self.aer_seed()
+            )
+        return channel.apply(results, self.rng, depolarize=False)
+
+    def intercept_resend(self, bits, prep_bases, eve_bases, measure_bases):
+        if self.mode != "dynamic":
+            return super().intercept_resend(bits, prep_bases, eve_bases, measure_bases)
+        from bb84 import aer
+
+        return aer.intercept_resend_dynamic(bits, prep_bases, eve_bases, measure_bases, seed_simulator=self.aer_seed())
+
+
+ENGINES = {engine.name: engine for engine in (NumpyEngine, QiskitEngine)}
+
+
+def get_engine(engine=None, seed=None, **options):
+    """Resolve an engine name (default "numpy") or pass an instance through."""
+    if isinstance(engine, Engine):
+        return engine
+    name = engine or "numpy"
+    if name not in ENGINES:
+        raise ValueError(f"Unknown engine: {name!r} (choose from {', '.join(ENGINES)})")
+    return ENGINES[name](seed=seed, **options)
+
+
+# -------------------------------
+# PROTOCOL
+# -------------------------------
+
+def run_protocol(n, eve=False, engine=None, seed=None, channel=None):
+    """
+    One BB84 transmission of n qubits:
+    1. Alice picks random bits and bases
+    2. Eve (optional) intercepts in random bases and resends what she measured
+    3. The qubits cross the channel (optional ChannelModel) to Bob
+    4. Bob measures in random bases; "detected" marks the pulses that clicked
+    eve=True is full intercept-resend through the engine. eve can also be an
+    attack kernel from bb84.attacks (or its name, or a functools.partial
+    with its parameters); the kernel then models everything up to Bob's
+    measurement and adds Eve's per-qubit information as "eve_info".
+    """
+    engine = get_engine(engine, seed)
+    if isinstance(eve, str):
+        from bb84.attacks import ATTACKS
+
+        eve = ATTACKS[eve]
+
+    with stage("encode", n):
+        alice_bits = engine.random_bits(n)
+        alice_bases = engine.random_bits(n)
+        bob_bases = engine.random_bits(n)
+
+    eve_bases = eve_bits = bob_bits = eve_info = None
+    sent_bits, sent_bases = alice_bits, alice_bases
+    if callable(eve):
+        with stage("eve", n):
+            attack = eve(engine.rng, alice_bits, alice_bases, bob_bases)
+        eve_bases, eve_bits, eve_info = attack["eve_bases"], attack["eve_bits"], attack["eve_info"]
+        bob_bits, detected = attack["bob_bits"], attack["detected"]
+        if channel is not None:
+            with stage("measure", n):
+                bob_bits, clicked = channel.apply(bob_bits, engine.rng)
+            detected = detected & clicked
+    elif eve:
+        with stage("eve", n):
+            eve_bases = engine.random_bits(n)
+            if channel is None:
+                # Eve and Bob in one engine call (a single Aer job in dynamic mode)
+                eve_bits, bob_bits = engine.intercept_resend(alice_bits, alice_bases, eve_bases, bob_bases)
+            else:
+                eve_bits = engine.measure(alice_bits, alice_bases, eve_bases)
+        sent_bits, sent_bases = eve_bits, eve_bases
+
+    if not callable(eve):
+        with stage("measure", n):
+            if channel is not None:
+                bob_bits, detected = engine.transmit(sent_bits, sent_bases, bob_bases, channel)
+            else:
+                if bob_bits is None:
+                    bob_bits = engine.measure(sent_bits, sent_bases, bob_bases)
+                detected = np.ones(n, dtype=bool)
+
+    return {
+        "alice_bits": alice_bits,
+        "alice_bases": alice_bases,
+        "eve_bases": eve_bases,
+        "eve_bits": eve_bits,
+        "bob_bases": bob_bases,
+        "bob_bits": bob_bits,
+        "detected": detected,
+        "eve_info": eve_info,
+    }
+
+
+def sift(transmission):
+    """Keep the detected positions where Alice's and Bob's bases agree."""
+    with stage("sift", len(transmission["alice_bases"])):
+        mask = (transmission["alice_bases"] == transmission["bob_bases"]) & transmission["detected"]
+        return transmission["alice_bits"][mask], transmission["bob_bits"][mask], np.flatnonzero(mask)
@@ -0,0 +1,68 @@
+import numpy as np
+
+from bb84.profiling import stage
+
+# -------------------------------
+# SAMPLED QBER ESTIMATION
+# -------------------------------
+# Rather than comparing the whole sifted key (and then having nothing
+# secret left), Alice and Bob disclose a random sample of positions, take
+# the QBER of that sample and keep the undisclosed rest as key. Hoeffding's
+# inequality (which also holds when sampling without replacement) bounds
+# how far the sifted key's true error rate can sit above the sample's:
+#     P(QBER >= sample QBER + t) <= exp(-2 m t^2)
+# for m sampled bits, so m = ln(1 / (1 - confidence)) / (2 t^2) bits give a
+# one-sided bound of width t at that confidence.
+
+SAMPLE_CONFIDENCE = 0.99
+SAMPLE_TOLERANCE = 0.05
+MAX_SAMPLE_FRACTION = 0.5  # never disclose more than this share of a sifted key
+
+
+def sample_size(confidence=SAMPLE_CONFIDENCE, tolerance=SAMPLE_TOLERANCE):
+    """Sampled bits for a QBER bound of width `tolerance` at `confidence`."""
+    return int(np.ceil(np.log(1 / (1 - confidence)) / (2 * tolerance**2)))
+
+
+def hoeffding_tolerance(m, confidence=SAMPLE_CONFIDENCE):
+    """Width of the one-sided bound that m sampled bits reach at `confidence`."""
+    if m <= 0:
+        return 1.0
+    return float(np.sqrt(np.log(1 / (1 - confidence)) / (2 * m)))
+
+
+def estimate_qber(alice_key, bob_key, confidence=SAMPLE_CONFIDENCE, tolerance=SAMPLE_TOLERANCE,
+                  max_fraction=MAX_SAMPLE_FRACTION, rng=None):
+    """
+    Disclose a random sample of sifted positions and estimate the QBER from it.
+    Returns the sample's QBER, an upper bound on the error rate of the
+    undisclosed remainder at `confidence`, and that remainder as the keys.
+    When max_fraction caps the sample, the bound is wider than `tolerance`.
+    """
+    rng = np.random.default_rng(rng)
+    n = len(alice_key)
+    m = min(sample_size(confidence, tolerance), int(n * max_fraction))
+    m = max(m, 1) if n else 0
+
+    with stage("estimate", m):
+        indices = np.sort(rng.choice(n, size=m, replace=False))
+        errors = int(np.count_nonzero(alice_key[indices] != bob_key[indices]))
+        keep = np.ones(n, dtype=bool)
+        keep[indices] = False
+        alice_rest, bob_rest = alice_key[keep], bob_key[keep]
+
+    qber = errors / m if m else 1.0
+    # Bound the errors of the whole sifted key, then take out the disclosed ones
+    total_bound = min(qber + hoeffding_tolerance(m, confidence), 1.0)
+    rest = n - m
+    qber_bound = min(max((n * total_bound - errors) / rest, 0.0), 1.0) if rest else 1.0
+    return {
+        "qber": qber,
+        "qber_bound": qber_bound,
+        "confidence": confidence,
+        "sampled": m,
+        "errors": errors,
+        "indices": indices,
+        "alice_key": alice_rest,
+        "bob_key": bob_rest,
+    }
@@ -0,0 +1,147 @@
+import threading
+from collections import deque
+from contextvars import copy_context
+
+from bb84.profiling import StageTimer, timing
+
+# -------------------------------
+# BACKGROUND JOBS
+# -------------------------------
+# A job is a generator that does one bounded chunk of work per next(),
+# yields a progress dict ({"done": ..., "total": ..., ...}) and returns its
+# result. JobPool runs jobs on a fixed set of worker threads one chunk at a
+# time. After each chunk the job goes to the back of the run queue, so a
+# heavy run and a light one submitted next to it advance in turn rather
+# than one after the other. cancel() takes effect before the next chunk.
+# Every job runs in a copy of its submitter's context and carries its own
+# StageTimer: each chunk is timed on the worker that runs it, so stage()
+# calls in the generator are recorded and job.timer.total_seconds leaves
+# out the time the job spent queued. Generators must not open profiled()
+# blocks themselves, since those would span threads.
+
+WORKERS = 2
+MAX_QUEUED_JOBS = 32
+
+
+class Job:
+    """Handle on a submitted job; its attributes may be read from any thread."""
+
+    def __init__(self, steps, label="job", track_memory=False):
+        self.label = label
+        self.timer = StageTimer(label)
+        self.track_memory = track_memory
+        self.state = "queued"  # queued, running, done, cancelled or failed
+        self.progress = None  # last dict the generator yielded
+        self.result = None
+        self.error = None
+        self.chunks = 0
+        self._steps = steps
+        self._context = copy_context()
+        self._cancelled = threading.Event()
+        self._finished = threading.Event()
+
+    @property
+    def finished(self):
+        return self._finished.is_set()
+
+    @property
+    def fraction(self):
+        """Share of the work done so far, from the last progress dict."""
+        if self.state == "done":
+            return 1.0
+        if not self.progress or not self.progress.get("total"):
+            return 0.0
+        return min(self.progress["done"] / self.progress["total"], 1.0)
+
+    def cancel(self):
+        self._cancelled.set()
+
+    def wait(self, timeout=None):
+        return self._finished.wait(timeout)
+
+    def _finish(self, state):
+        self.state = state
+        self._finished.set()
+
+    def _timed(self, step):
+        with timing(self.timer, self.track_memory):
+            return step()
+
+    def _step(self):
+        """Run one chunk; True while the job has more work."""
+        if self._cancelled.is_set():
+            self._context.run(self._timed, self._steps.close)  # runs the generator's finally/with blocks
+            self._finish("cancelled")
+            return False
+        self.state = "running"
+        try:
+            self.progress = self._context.run(self._timed, self._steps.__next__)
+        except StopIteration as stop:
+            self.result = stop.value
+            self._finish("done")
+            return False
+        except Exception as exc:
+            self.error = exc
+            self._finish("failed")
+            return False
+        self.chunks += 1
+        return True
+
+
+class JobPool:
+    """Bounded set of worker threads that round-robin chunked jobs."""
+
+    def __init__(self, workers=WORKERS, max_queued=MAX_QUEUED_JOBS):
+        self.workers = workers
+        self.max_queued = max_queued
+        self._queue = deque()
+        self._stopped = False
+        self._cond = threading.Condition()
+        self._threads = []
+
+    def start(self):
+        if not self._threads:
+            for i in range(self.workers):
+                thread = threading.Thread(target=self._work, name=f"bb84-job-{i}", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+        return self
+
+    def stop(self):
+        with self._cond:
+            self._stopped = True
+            self._cond.notify_all()
+        for thread in self._threads:
+            thread.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def submit(self, steps, label="job", track_memory=False):
+        """Queue a generator of chunks; returns its Job."""
+        job = Job(steps, label, track_memory)
+        with self._cond:
+            if len(self._queue) >= self.max_queued:
+                raise RuntimeError(f"Job queue is full ({self.max_queued} jobs waiting); try again shortly")
+            self._queue.append(job)
+            self._cond.notify()
+        return job
+
+    def _work(self):
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._stopped or self._queue)
+                if self._stopped:
+                    return
+                job = self._queue.popleft()
+            if job._step():
+                with self._cond:
+                    self._queue.append(job)
+                    self._cond.notify()
+
+    def metrics(self):
+        with self._cond:
+            return {"workers": self.workers, "queued": len(self._queue)}
@@ -0,0 +1,177 @@
+import threading
+import time
+from contextvars import copy_context
+
+import numpy as np
+
+from bb84.crypto import pack_with_carry
+from bb84.keystream import MAX_CONSECUTIVE_ABORTS
+
+# -------------------------------
+# BACKGROUND KEY POOL
+# -------------------------------
+# A worker thread pulls blocks from key_blocks() and appends the ones that
+# passed their QBER check to a pair of byte buffers, until the pool holds
+# high_water_bytes. take() only slices bytes off the front of those
+# buffers, so a request costs its own size and never waits for a BB84
+# round unless the pool has run dry. Handed-out bytes are deleted, so key
+# is never reused.
+
+HIGH_WATER_BYTES = 16 * 1024
+
+
+class KeyPool:
+    """Thread-refilled reservoir of verified key, a drop-in for KeyStream.take."""
+
+    def __init__(self, blocks, high_water_bytes=HIGH_WATER_BYTES, max_consecutive_aborts=MAX_CONSECUTIVE_ABORTS,
+                 timeout=None):
+        self.blocks = blocks
+        self.high_water_bytes = high_water_bytes
+        self.max_consecutive_aborts = max_consecutive_aborts
+        self.timeout = timeout  # default wait of take() on an empty pool
+        self.rounds = 0
+        self.aborted = 0
+        self.starvations = 0
+        self.bits_drawn = 0
+        self.bits_leaked = 0
+        self.bytes_served = 0
+        self.last_qber = None
+        self.last_qber_bound = None
+        self.error = None
+        self._alice = bytearray()
+        self._bob = bytearray()
+        # Bits of the last block that did not fill a whole byte yet
+        self._alice_carry = np.empty(0, dtype=np.uint8)
+        self._bob_carry = np.empty(0, dtype=np.uint8)
+        self._demand = 0
+        self._refill_bits = 0  # only bits the refill thread drew, for the refill rate
+        self._refill_seconds = 0.0
+        self._stopped = False
+        self._cond = threading.Condition()
+        self._thread = None
+
+    def start(self):
+        if self._thread is None:
+            # Run in the starter's context, so a profiled() run times every refill round
+            context = copy_context()
+            self._thread = threading.Thread(
+                target=context.run, args=(self._refill,), name="bb84-key-pool", daemon=True
+            )
+            self._thread.start()
+        return self
+
+    def stop(self):
+        with self._cond:
+            self._stopped = True
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def put(self, block):
+        """Add a block that passed its checks elsewhere (e.g. the caller's first round)."""
+        if not block["ok"]:
+            raise ValueError("Only blocks that passed their checks can be added to the pool")
+        with self._cond:
+            self.rounds += 1
+            self.last_qber = block["qber"]
+            self.last_qber_bound = block.get("qber_bound")
+            self._store(block)
+
+    def _store(self, block):
+        """Append a block's keys to the buffers; the caller holds the lock."""
+        packed, self._alice_carry = pack_with_carry(self._alice_carry, block["alice_key"])
+        self._alice += packed.tobytes()
+        packed, self._bob_carry = pack_with_carry(self._bob_carry, block["bob_key"])
+        self._bob += packed.tobytes()
+        self.bits_drawn += len(block["alice_key"])
+        self.bits_leaked += block.get("bits_leaked", 0)
+        self._cond.notify_all()
+
+    def _refill(self):
+        consecutive_aborts = 0
+        while True:
+            with self._cond:
+                self._cond.wait_for(
+                    lambda: self._stopped or len(self._alice) < max(self.high_water_bytes, self._demand)
+                )
+                if self._stopped:
+                    return
+
+            start = time.perf_counter()
+            try:
+                block = next(self.blocks)
+            except Exception as exc:
+                # Fail the pool rather than leave take() waiting on a dead thread
+                with self._cond:
+                    if isinstance(exc, StopIteration):
+                        exc = RuntimeError("Key block generator is exhausted")
+                    self.error = exc
+                    self._cond.notify_all()
+                return
+            elapsed = time.perf_counter() - start
+
+            with self._cond:
+                self.rounds += 1
+                self.last_qber = block["qber"]
+                self.last_qber_bound = block.get("qber_bound")
+                self._refill_seconds += elapsed
+                if not block["ok"]:
+                    self.aborted += 1
+                    consecutive_aborts += 1
+                    if consecutive_aborts >= self.max_consecutive_aborts:
+                        self.error = RuntimeError(
+                            f"{consecutive_aborts} consecutive key rounds failed the QBER check "
+                            f"(last QBER {block['qber']:.2%}); possible eavesdropping"
+                        )
+                        self._cond.notify_all()
+                        return
+                    continue
+                consecutive_aborts = 0
+                self._refill_bits += len(block["alice_key"])
+                self._store(block)
+
+    def take(self, n_bytes, timeout=None, retry=False):
+        """
+        Packed (alice_key, bob_key) pair of n_bytes each, removed from the pool.
+        Pass retry=True when repeating a request that timed out, so one
+        request waiting in short slices counts as a single starvation.
+        """
+        timeout = self.timeout if timeout is None else timeout
+        with self._cond:
+            if len(self._alice) < n_bytes:
+                if not retry:
+                    self.starvations += 1
+                self._demand = max(self._demand, n_bytes)
+                self._cond.notify_all()
+                if not self._cond.wait_for(lambda: len(self._alice) >= n_bytes or self.error, timeout):
+                    raise TimeoutError(f"Key pool could not supply {n_bytes} bytes within {timeout}s")
+                self._demand = 0
+                if len(self._alice) < n_bytes:
+                    raise self.error
+            alice, bob = bytes(self._alice[:n_bytes]), bytes(self._bob[:n_bytes])
+            del self._alice[:n_bytes]
+            del self._bob[:n_bytes]
+            self.bytes_served += n_bytes
+            self._cond.notify_all()
+        return np.frombuffer(alice, dtype=np.uint8), np.frombuffer(bob, dtype=np.uint8)
+
+    def metrics(self):
+        with self._cond:
+            return {
+                "fill_bytes": len(self._alice),
+                "fill_level": len(self._alice) / self.high_water_bytes,
+                "refill_bits_per_s": self._refill_bits / self._refill_seconds if self._refill_seconds else 0.0,
+                "rounds": self.rounds,
+                "aborted": self.aborted,
+                "starvations": self.starvations,
+                "bytes_served": self.bytes_served,
+                "last_qber": self.last_qber,
+                "last_qber_bound": self.last_qber_bound,
+                "failed": self.error is not None,
+            }
@@ -0,0 +1,143 @@
+import numpy as np
+
+from bb84.cascade import reconcile
+from bb84.crypto import key_digest, pack_key, xor_bytes
+from bb84.engine import QBER_THRESHOLD, get_engine, run_protocol, sift
+from bb84.estimation import SAMPLE_CONFIDENCE, estimate_qber
+from bb84.privacy import amplify
+from bb84.profiling import stage
+
+# -------------------------------
+# STREAMING KEY GENERATION
+# -------------------------------
+
+ROUND_QUBITS = 4096  # qubits sent per BB84 round
+MAX_CONSECUTIVE_ABORTS = 8
+
+
+def key_blocks(round_qubits=ROUND_QUBITS, eve=False, engine=None, seed=None, threshold=QBER_THRESHOLD,
+               error_correction=True, privacy_amplification=True, estimation="full", confidence=SAMPLE_CONFIDENCE):
+    """
+    Endless generator of key blocks, one BB84 round each.
+    Every block carries its own QBER check; "ok" is False when the round
+    produced no sifted bits or its QBER is above the threshold.
+    With estimation="full" the QBER compares the whole sifted key; with
+    "sample" only a random sample sized for `confidence` is disclosed, the
+    block keeps the rest and reports its bound as "qber_bound". The bound,
+    not the sample's QBER, is then checked against the threshold and sizes
+    both Cascade's blocks and the amplified key (a sample with no errors
+    would make Cascade check the whole key as one block). It only reaches
+    its tolerance when a round sifts at least sample_size() /
+    MAX_SAMPLE_FRACTION bits, which ROUND_QUBITS does at the default
+    confidence.
+    With error_correction, Bob's key of every passing block is reconciled
+    with Cascade and the block reports the parity bits leaked doing so;
+    the final keys are then confirmed by comparing their hashes, and a
+    block Cascade did not fully correct is marked not ok.
+    With privacy_amplification, both keys are then Toeplitz-hashed down to
+    the length that stays secret given the QBER and that leak; a block
+    with nothing left is marked not ok.
+    """
+    if estimation not in ("full", "sample"):
+        raise ValueError(f"Unknown QBER estimation {estimation!r}; use 'full' or 'sample'")
+    engine = get_engine(engine, seed)
+    sample_rng = np.random.default_rng(np.random.SeedSequence(seed).spawn(1)[0])
+    round_no = 0
+    while True:
+        alice_key, bob_key, _ = sift(run_protocol(round_qubits, eve=eve, engine=engine))
+        qber_bound = None
+        if estimation == "sample":
+            estimate = estimate_qber(alice_key, bob_key, confidence, rng=sample_rng)
+            qber, qber_bound = estimate["qber"], estimate["qber_bound"]
+            ok = estimate["sampled"] > 0 and qber_bound <= threshold
+            alice_key, bob_key = estimate["alice_key"], estimate["bob_key"]
+        else:
+            qber = np.count_nonzero(alice_key != bob_key) / len(alice_key) if len(alice_key) > 0 else 1.0
+            ok = len(alice_key) > 0 and qber <= threshold
+        bits_leaked = round_trips = 0
+        if ok and error_correction:
+            with stage("reconcile", len(alice_key)):
+                cascade = reconcile(alice_key, bob_key, qber if qber_bound is None else qber_bound)
+            bob_key = cascade["key"]
+            bits_leaked, round_trips = cascade["bits_leaked"], cascade["round_trips"]
+        if ok and privacy_amplification:
+            with stage("amplify", len(alice_key)):
+                alice_key, bob_key = amplify(
+                    alice_key, bob_key, qber if qber_bound is None else qber_bound,
+                    bits_leaked if error_correction else None,
+                )
+            ok = len(alice_key) > 0
+        if ok and error_correction:
+            with stage("confirm", len(alice_key)):
+                ok = key_digest(alice_key) == key_digest(bob_key)
+        yield {
+            "round": round_no,
+            "alice_key": alice_key,
+            "bob_key": bob_key,
+            "qber": qber,
+            "qber_bound": qber_bound,
+            "ok": ok,
+            "bits_leaked": bits_leaked,
+            "round_trips": round_trips,
+        }
+        round_no += 1
+
+
+class KeyStream:
+    """Hands out key from a block generator in byte units, never reusing a bit."""
+
+    def __init__(self, blocks, max_consecutive_aborts=MAX_CONSECUTIVE_ABORTS):
+        self.blocks = blocks
+        self.max_consecutive_aborts = max_consecutive_aborts
+        self.rounds = 0
+        self.aborted = 0
+        self.bits_drawn = 0
+        self.bits_leaked = 0
+        # Unused tail of the last block (always shorter than one block)
+        self._alice = np.empty(0, dtype=np.uint8)
+        self._bob = np.empty(0, dtype=np.uint8)
+
+    def take(self, n_bytes):
+        """Packed (alice_key, bob_key) pair of n_bytes each."""
+        n_bits = n_bytes * 8
+        alice_parts, bob_parts = [self._alice], [self._bob]
+        available = len(self._alice)
+        consecutive_aborts = 0
+        while available < n_bits:
+            block = next(self.blocks)
+            self.rounds += 1
+            if not block["ok"]:
+                # A bad round only costs its own block
+                self.aborted += 1
+                consecutive_aborts += 1
+                if consecutive_aborts >= self.max_consecutive_aborts:
+                    raise RuntimeError(
+                        f"{consecutive_aborts} consecutive key rounds failed the QBER check "
+                        f"(last QBER {block['qber']:.2%}); possible eavesdropping"
+                    )
+                continue
+            consecutive_aborts = 0
+            alice_parts.append(block["alice_key"])
+            bob_parts.append(block["bob_key"])
+            available += len(block["alice_key"])
+            self.bits_drawn += len(block["alice_key"])
+            self.bits_leaked += block.get("bits_leaked", 0)
+
+        alice = np.concatenate(alice_parts)
+        bob = np.concatenate(bob_parts)
+        self._alice, self._bob = alice[n_bits:], bob[n_bits:]
+        return pack_key(alice[:n_bits]), pack_key(bob[:n_bits])
+
+
+def stream_transfer(chunks, key_stream):
+    """Alice encrypts every chunk with fresh key; Bob decrypts it with his copy.
+
+    Yields (ciphertext, bob_plaintext) pairs, so memory stays bounded by
+    the chunk size however long the payload is.
+    """
+    for chunk in chunks:
+        alice_key, bob_key = key_stream.take(len(chunk))
+        with stage("encrypt", len(chunk)):
+            ciphertext = xor_bytes(chunk, alice_key)
+            plaintext = xor_bytes(ciphertext, bob_key)
+        yield ciphertext, plaintext
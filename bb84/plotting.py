@@ -0,0 +1,87 @@
+import numpy as np
+
+# -------------------------------
+# CURVE DOWNSAMPLING
+# -------------------------------
+# Running-QBER curves have one point per sifted bit. Charts only need a
+# fixed number of points, picked so the shape (spikes included) survives.
+
+MAX_PLOT_POINTS = 2000
+
+
+def minmax_downsample(x, y, n_buckets):
+    """Keep the first, min and max point of each of n_buckets equal buckets."""
+    x, y = np.asarray(x), np.asarray(y)
+    n = len(y)
+    if n <= 3 * n_buckets:
+        return x, y
+    edges = np.linspace(0, n, n_buckets + 1).astype(np.int64)
+    starts = edges[:-1]
+    # Bucket-wise argmin/argmax via a padded 2-D view of the data
+    width = int(np.max(np.diff(edges)))
+    idx = np.minimum(starts[:, None] + np.arange(width), n - 1)
+    idx = np.where(idx < edges[1:, None], idx, starts[:, None])
+    window = y[idx]
+    picks = np.concatenate([
+        starts,
+        idx[np.arange(n_buckets), window.argmin(axis=1)],
+        idx[np.arange(n_buckets), window.argmax(axis=1)],
+        [n - 1],
+    ])
+    picks = np.unique(picks)
+    return x[picks], y[picks]
+
+
+def lttb(x, y, n_out):
+    """Largest-Triangle-Three-Buckets downsampling to n_out points."""
+    x, y = np.asarray(x, dtype=np.float64), np.asarray(y, dtype=np.float64)
+    n = len(y)
+    if n <= n_out or n_out < 3:
+        return x, y
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    picks = np.empty(n_out, dtype=np.int64)
+    picks[0], picks[-1] = 0, n - 1
+    prev = 0
+    for b in range(n_out - 2):
+        start, end = edges[b], edges[b + 1]
+        next_end = edges[b + 2] if b + 2 < len(edges) else n
+        # Average of the next bucket is the third corner of the triangle
+        avg_x = x[end:next_end].mean() if next_end > end else x[-1]
+        avg_y = y[end:next_end].mean() if next_end > end else y[-1]
+        area = np.abs(
+            (x[prev] - avg_x) * (y[start:end] - y[prev]) - (x[prev] - x[start:end]) * (avg_y - y[prev])
+        )
+        prev = start + int(area.argmax())
+        picks[b + 1] = prev
+    return x[picks], y[picks]
+
+
+def downsample_curve(x, y, n_out=MAX_PLOT_POINTS):
+    """Min/max pre-reduction followed by LTTB: O(n) and shape-preserving."""
+    x, y = minmax_downsample(x, y, n_out)
+    return lttb(x, y, n_out)
+
+
+class RunningQberCurve:
+    """Running-QBER curve fed chunk by chunk, never more than max_points long."""
+
+    def __init__(self, max_points=MAX_PLOT_POINTS):
+        self.max_points = max_points
+        self.sifted = 0
+        self.errors = 0
+        self.x = np.empty(0, dtype=np.float64)
+        self.y = np.empty(0, dtype=np.float64)
+
+    def add(self, sifted_indices, error_mask):
+        """Extend the curve with one chunk of sifted positions and their errors."""
+        if len(error_mask) == 0:
+            return
+        cumulative = self.errors + np.cumsum(error_mask, dtype=np.int64)
+        trials = self.sifted + np.arange(1, len(error_mask) + 1)
+        x, y = minmax_downsample(sifted_indices, cumulative / trials, self.max_points // 2)
+        self.x = np.concatenate([self.x, x])
+        self.y = np.concatenate([self.y, y])
+        if len(self.x) > self.max_points:
+            self.x, self.y = lttb(self.x, self.y, self.max_points)
+        self.sifted += len(error_mask)
+        self.errors = int(cumulative[-1])
@@ -0,0 +1,49 @@
+import numpy as np
+
+# -------------------------------
+# PRIVACY AMPLIFICATION
+# -------------------------------
+# The reconciled key is compressed with a random Toeplitz matrix (a
+# universal hash family). T is m x n with T[i, j] = seed[i - j + n - 1],
+# so T @ x is a slice of the convolution seed * x, which is computed with
+# FFTs in O(n log n) instead of the O(n * m) matrix product.
+
+SECURITY_MARGIN = 40  # bits sacrificed so the hash fails with probability ~2^-20
+
+
+def binary_entropy(p):
+    if p <= 0 or p >= 1:
+        return 0.0
+    return float(-p * np.log2(p) - (1 - p) * np.log2(1 - p))
+
+
+def secure_key_length(n, qber, bits_leaked=None, margin=SECURITY_MARGIN):
+    """
+    Bits that stay secret after amplification: n * (1 - h(QBER)) minus the
+    error-correction leak (ideal n * h(QBER) when not measured) and margin.
+    """
+    if bits_leaked is None:
+        bits_leaked = n * binary_entropy(qber)
+    return max(int(np.floor(n * (1 - binary_entropy(qber)) - bits_leaked - margin)), 0)
+
+
+def toeplitz_hash(key, out_len, seed_bits):
+    """Toeplitz hash of a 0/1 key to out_len bits (seed_bits: n + out_len - 1 bits)."""
+    key = np.asarray(key, dtype=np.float64)
+    n = len(key)
+    if out_len <= 0 or n == 0:
+        return np.zeros(0, dtype=np.uint8)
+    seed_bits = np.asarray(seed_bits[: n + out_len - 1], dtype=np.float64)
+
+    size = 1 << (n + len(seed_bits) - 2).bit_length()  # >= full convolution length
+    conv = np.fft.irfft(np.fft.rfft(seed_bits, size) * np.fft.rfft(key, size), size)
+    window = conv[n - 1 : n - 1 + out_len]
+    return (np.rint(window).astype(np.int64) & 1).astype(np.uint8)
+
+
+def amplify(alice_key, bob_key, qber, bits_leaked=None, seed=None, margin=SECURITY_MARGIN):
+    """Compress both reconciled keys with the same public Toeplitz seed."""
+    n = len(alice_key)
+    out_len = secure_key_length(n, qber, bits_leaked, margin)
+    seed_bits = np.random.default_rng(seed).integers(0, 2, max(n + out_len - 1, 0), dtype=np.uint8)
+    return toeplitz_hash(alice_key, out_len, seed_bits), toeplitz_hash(bob_key, out_len, seed_bits)
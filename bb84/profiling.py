@@ -0,0 +1,183 @@
+import cProfile
+import json
+import os
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+# -------------------------------
+# STAGE TIMERS AND PROFILING
+# -------------------------------
+# Protocol code marks its stages with `with stage("measure", n):`. This
+# costs almost nothing unless a run is wrapped in profiled(), which
+# collects wall time, call count, items (qubits or bytes) and, while
+# tracemalloc is on, net allocations and peak memory for each stage.
+# Stages may nest; every stage reports inclusive figures.
+# Set BB84_PROFILE to a directory and each profiled() run also writes a
+# cProfile .prof file, a tracemalloc snapshot and the stage table there.
+
+PROFILE_ENV = "BB84_PROFILE"
+
+_CURRENT = ContextVar("bb84_stage_timer", default=None)
+_TRACING_LOCK = threading.Lock()
+_tracing = {"users": 0, "owned": False}  # blocks inside memory_tracing(); whether they started it
+
+
+class StageTimer:
+    """Per-stage totals for one profiled run."""
+
+    def __init__(self, label="run"):
+        self.label = label
+        self.stages = {}
+        self.total_seconds = 0.0
+        # Per thread (a KeyPool refill thread may time stages concurrently):
+        # highest traced memory seen inside each open stage
+        self._local = threading.local()
+
+    @contextmanager
+    def stage(self, name, items=0):
+        stats = self.stages.setdefault(
+            name, {"calls": 0, "seconds": 0.0, "items": 0, "alloc_bytes": None, "peak_bytes": None}
+        )
+        tracing = tracemalloc.is_tracing()
+        stack = self._local.__dict__.setdefault("stack", [])
+        if tracing:
+            before, peak = tracemalloc.get_traced_memory()
+            if stack:
+                # The reset below would lose what the enclosing stage reached so far
+                stack[-1] = max(stack[-1], peak)
+            tracemalloc.reset_peak()
+            stack.append(before)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            stats["seconds"] += time.perf_counter() - start
+            stats["calls"] += 1
+            stats["items"] += items
+            if tracing:
+                current, peak = tracemalloc.get_traced_memory()
+                # An inner stage resets the peak, so fold in what it saw
+                peak = max(peak, stack.pop())
+                if stack:
+                    stack[-1] = max(stack[-1], peak)
+                stats["alloc_bytes"] = (stats["alloc_bytes"] or 0) + current - before
+                stats["peak_bytes"] = max(stats["peak_bytes"] or 0, peak - before)
+
+    def report(self):
+        """One row per stage, in the order the stages first ran."""
+        return [
+            {
+                "stage": name,
+                "calls": stats["calls"],
+                "seconds": stats["seconds"],
+                "share": stats["seconds"] / self.total_seconds if self.total_seconds else None,
+                "items": stats["items"],
+                "items_per_s": stats["items"] / stats["seconds"] if stats["items"] and stats["seconds"] else None,
+                "alloc_bytes": stats["alloc_bytes"],
+                "peak_bytes": stats["peak_bytes"],
+            }
+            for name, stats in self.stages.items()
+        ]
+
+
+@contextmanager
+def stage(name, items=0):
+    """Time a protocol stage of the enclosing profiled() run, if any."""
+    timer = _CURRENT.get()
+    if timer is None:
+        yield
+        return
+    with timer.stage(name, items):
+        yield
+
+
+@contextmanager
+def memory_tracing(enabled=True):
+    """
+    tracemalloc on for the block. Overlapping blocks, on any thread, share
+    one tracing session, stopped by the last of them to leave; tracing
+    started outside these blocks is left alone.
+    """
+    if not enabled:
+        yield
+        return
+    with _TRACING_LOCK:
+        if _tracing["users"] == 0 and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            _tracing["owned"] = True
+        _tracing["users"] += 1
+    try:
+        yield
+    finally:
+        with _TRACING_LOCK:
+            _tracing["users"] -= 1
+            if _tracing["users"] == 0 and _tracing["owned"]:
+                tracemalloc.stop()
+                _tracing["owned"] = False
+
+
+@contextmanager
+def timing(timer, track_memory=False):
+    """
+    Count the block, on this thread, towards `timer`'s run. For runs done
+    in chunks (see bb84.jobs): total_seconds adds up the chunks only, so
+    time spent waiting between them is left out.
+    """
+    token = _CURRENT.set(timer)
+    start = time.perf_counter()
+    try:
+        with memory_tracing(track_memory):
+            yield timer
+    finally:
+        timer.total_seconds += time.perf_counter() - start
+        _CURRENT.reset(token)
+
+
+@contextmanager
+def profiled(label="run", track_memory=False, profile_dir=None):
+    """Collect stage timings for everything run inside the block."""
+    profile_dir = profile_dir or os.environ.get(PROFILE_ENV)
+    timer = StageTimer(label)
+    token = _CURRENT.set(timer)
+    try:
+        with memory_tracing(bool(track_memory or profile_dir)):
+            profiler = cProfile.Profile() if profile_dir else None
+            if profiler is not None:
+                profiler.enable()
+            start = time.perf_counter()
+            try:
+                yield timer
+            finally:
+                timer.total_seconds = time.perf_counter() - start
+                if profiler is not None:
+                    profiler.disable()
+                    dump_profile(timer, profiler, profile_dir)
+    finally:
+        _CURRENT.reset(token)
+
+
+def dump_profile(timer, profiler, profile_dir):
+    """Write <label>-<time>-<pid>.{prof,tracemalloc,json} into profile_dir."""
+    os.makedirs(profile_dir, exist_ok=True)
+    base = os.path.join(profile_dir, f"{timer.label}-{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}")
+    profiler.dump_stats(base + ".prof")
+    if tracemalloc.is_tracing():
+        tracemalloc.take_snapshot().dump(base + ".tracemalloc")
+    with open(base + ".json", "w") as f:
+        json.dump({"label": timer.label, "total_seconds": timer.total_seconds, "stages": timer.report()}, f, indent=2)
+    return base
+
+
+def format_report(timer):
+    """Plain-text stage table for the command-line entry points."""
+    lines = [f"{'Stage':<16}{'Calls':>7}{'Time (ms)':>12}{'Share':>8}{'Items/s':>14}{'Peak MiB':>10}"]
+    for row in timer.report():
+        share = f"{row['share']:.1%}" if row["share"] is not None else "-"
+        rate = f"{row['items_per_s']:,.0f}" if row["items_per_s"] else "-"
+        peak = f"{row['peak_bytes'] / 2**20:.2f}" if row["peak_bytes"] is not None else "-"
+        lines.append(f"{row['stage']:<16}{row['calls']:>7}{row['seconds'] * 1e3:>12.2f}{share:>8}{rate:>14}{peak:>10}")
+    lines.append(f"{'total':<16}{'':>7}{timer.total_seconds * 1e3:>12.2f}")
+    return "\n".join(lines)
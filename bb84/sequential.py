@@ -0,0 +1,72 @@
+import numpy as np
+
+from bb84.engine import QBER_THRESHOLD, get_engine, run_protocol, sift
+
+# -------------------------------
+# SEQUENTIAL QBER MONITOR
+# -------------------------------
+# Instead of simulating the whole batch and looking at the errors at the
+# end, qubits are sent in chunks and a Wilson score interval on the QBER
+# is updated after every chunk. The run stops as soon as the interval
+# lies entirely above (reject) or below (accept) the threshold.
+
+CHUNK_QUBITS = 64
+CONFIDENCE_Z = 3.0  # conservative, since the interval is checked after every chunk
+
+
+def wilson_interval(errors, n, z=CONFIDENCE_Z):
+    """Wilson score interval for an error rate of errors / n."""
+    if n == 0:
+        return 0.0, 1.0
+    p = errors / n
+    denom = 1 + z * z / n
+    centre = (p + z * z / (2 * n)) / denom
+    half = z * np.sqrt(p * (1 - p) / n + z * z / (4 * n * n)) / denom
+    return max(centre - half, 0.0), min(centre + half, 1.0)
+
+
+def monitored_run(total_qubits, eve=False, engine=None, seed=None, threshold=QBER_THRESHOLD,
+                  chunk_qubits=CHUNK_QUBITS, z=CONFIDENCE_Z):
+    """
+    Transmit up to total_qubits in chunks, sifting and testing as they arrive.
+    Returns the decision, whether it was settled before the end of the run,
+    and how many qubits that saved compared with the full batch.
+    """
+    engine = get_engine(engine, seed)
+    sent = sifted = errors = 0
+    low, high = 0.0, 1.0
+    settled = False
+
+    while sent < total_qubits:
+        n = min(chunk_qubits, total_qubits - sent)
+        alice_key, bob_key, _ = sift(run_protocol(n, eve=eve, engine=engine))
+        sent += n
+        sifted += len(alice_key)
+        errors += int(np.count_nonzero(alice_key != bob_key))
+
+        low, high = wilson_interval(errors, sifted, z)
+        if low > threshold or high < threshold:
+            settled = True
+            break
+
+    qber = errors / sifted if sifted else 1.0
+    return {
+        "decision": "reject" if (low > threshold if settled else qber > threshold) else "accept",
+        "settled": settled,
+        "qber": qber,
+        "interval": (low, high),
+        "sifted": sifted,
+        "errors": errors,
+        "qubits_sent": sent,
+        "qubits_saved": total_qubits - sent,
+    }
+
+
+if __name__ == "__main__":
+    for eve_present in (False, True):
+        result = monitored_run(100_000, eve=eve_present)
+        low, high = result["interval"]
+        print(f"Eve present: {eve_present}")
+        print(f"  Decision: {result['decision']} ({'settled early' if result['settled'] else 'full run'})")
+        print(f"  QBER: {result['qber']:.2%}  interval [{low:.2%}, {high:.2%}] on {result['sifted']} sifted bits")
+        print(f"  Qubits sent: {result['qubits_sent']}  saved: {result['qubits_saved']}")
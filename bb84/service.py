@@ -0,0 +1,272 @@
+import argparse
+import asyncio
+import os
+import struct
+import tempfile
+import time
+
+import numpy as np
+
+from bb84.cascade import N_PASSES, cascade_permutations, cascade_steps, range_parities
+from bb84.crypto import key_digest, pack_key
+from bb84.engine import QBER_THRESHOLD, get_engine, run_protocol
+from bb84.privacy import secure_key_length, toeplitz_hash
+
+# -------------------------------
+# ALICE / BOB KEY-DISTRIBUTION SERVICE
+# -------------------------------
+# Alice is an asyncio server, Bob a client, and the public discussion runs
+# over a real local socket (TCP or Unix). Only the quantum channel is
+# simulated in-process (QuantumLink). Every classical message is a
+# binary frame: 1-byte type, 4-byte length, payload of packed bits or
+# big-endian uint32 index arrays. Each request/response pair is one round
+# trip: bases, QBER sample, every Cascade parity batch, key confirmation.
+
+SAMPLE_FRACTION = 0.1  # share of the sifted key disclosed for the QBER check
+
+HELLO, BASES, SAMPLE, QBER, PARITY_REQUEST, PARITIES, DONE, CONFIRM = range(1, 9)
+
+FRAME_HEADER = struct.Struct("!BI")
+HELLO_BODY = struct.Struct("!QQ")  # session id, public seed
+QBER_BODY = struct.Struct("!dB")  # estimated QBER, accepted
+PARITY_HEADER = struct.Struct("!HI")  # pass number, range count
+
+
+class FrameChannel:
+    """Frame reader/writer over an asyncio stream pair, with traffic counters."""
+
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+        self.bytes_sent = 0
+        self.bytes_received = 0
+
+    async def send(self, kind, payload=b""):
+        self.writer.write(FRAME_HEADER.pack(kind, len(payload)) + payload)
+        self.bytes_sent += FRAME_HEADER.size + len(payload)
+        await self.writer.drain()
+
+    async def receive(self, expected=None):
+        kind, length = FRAME_HEADER.unpack(await self.reader.readexactly(FRAME_HEADER.size))
+        payload = await self.reader.readexactly(length)
+        self.bytes_received += FRAME_HEADER.size + length
+        if expected is not None and kind != expected:
+            raise ConnectionError(f"Expected frame type {expected}, got {kind}")
+        return kind, payload
+
+    async def close(self):
+        self.writer.close()
+        await self.writer.wait_closed()
+
+
+def unpack_bits(payload, n, offset=0):
+    return np.unpackbits(np.frombuffer(payload, dtype=np.uint8, offset=offset), count=n)
+
+
+def session_seeds(seed):
+    """Independent public seeds for the Cascade shuffles and the Toeplitz hash."""
+    cascade_seed, hash_seed = np.random.SeedSequence(seed).spawn(2)
+    return cascade_seed, hash_seed
+
+
+def amplify_key(key, qber, bits_leaked, hash_seed):
+    out_len = secure_key_length(len(key), qber, bits_leaked)
+    seed_bits = np.random.default_rng(hash_seed).integers(0, 2, max(len(key) + out_len - 1, 0), dtype=np.uint8)
+    return toeplitz_hash(key, out_len, seed_bits)
+
+
+class QuantumLink:
+    """In-process stand-in for the quantum channel between the two endpoints."""
+
+    def __init__(self, engine=None, seed=None, eve=False, channel=None):
+        self.engine = get_engine(engine, seed)
+        self.eve = eve
+        self.channel = channel
+        self._alice_side = {}
+        self._next_session = 0
+
+    def transmit(self, n_qubits):
+        """Send n qubits; Alice's view is parked for her endpoint, Bob's returned."""
+        transmission = run_protocol(n_qubits, eve=self.eve, engine=self.engine, channel=self.channel)
+        session_id = self._next_session
+        self._next_session += 1
+        self._alice_side[session_id] = (transmission["alice_bits"], transmission["alice_bases"])
+        return session_id, transmission["bob_bases"], transmission["bob_bits"], transmission["detected"]
+
+    def receive(self, session_id):
+        return self._alice_side.pop(session_id)
+
+
+async def alice_endpoint(reader, writer, link, threshold=QBER_THRESHOLD):
+    """Alice's side of one session."""
+    chan = FrameChannel(reader, writer)
+    try:
+        _, payload = await chan.receive(HELLO)
+        session_id, seed = HELLO_BODY.unpack(payload)
+        alice_bits, alice_bases = link.receive(session_id)
+        cascade_seed, hash_seed = session_seeds(seed)
+        n = len(alice_bits)
+
+        # Sifting: Bob's bases and click pattern, answered with Alice's bases
+        _, payload = await chan.receive(BASES)
+        bob_bases = unpack_bits(payload, n)
+        detected = unpack_bits(payload, n, offset=(n + 7) // 8).astype(bool)
+        await chan.send(BASES, pack_key(alice_bases).tobytes())
+        key = alice_bits[(alice_bases == bob_bases) & detected]
+
+        # QBER check on the positions Bob discloses
+        _, payload = await chan.receive(SAMPLE)
+        (count,) = struct.unpack_from("!I", payload)
+        indices = np.frombuffer(payload, dtype=">u4", count=count, offset=4).astype(np.int64)
+        bob_sample = unpack_bits(payload, count, offset=4 + 4 * count)
+        qber = np.count_nonzero(key[indices] != bob_sample) / count if count else 1.0
+        accepted = bool(count > 0 and qber <= threshold)
+        await chan.send(QBER, QBER_BODY.pack(qber, accepted))
+        if not accepted:
+            return
+        key = np.delete(key, indices)
+
+        # Cascade: answer parity batches until Bob is done
+        perms = cascade_permutations(len(key), N_PASSES, cascade_seed)
+        bits_leaked = 0
+        while True:
+            kind, payload = await chan.receive()
+            if kind == DONE:
+                break
+            pass_no, count = PARITY_HEADER.unpack_from(payload)
+            ranges = np.frombuffer(payload, dtype=">u4", count=2 * count, offset=PARITY_HEADER.size).astype(np.int64)
+            parities = range_parities(key, perms[pass_no], ranges[:count], ranges[count:])
+            bits_leaked += count
+            await chan.send(PARITIES, np.packbits(parities).tobytes())
+
+        final_key = amplify_key(key, qber, bits_leaked, hash_seed)
+        await chan.send(CONFIRM, bytes([key_digest(final_key) == payload]))
+    except (asyncio.IncompleteReadError, ConnectionError):
+        pass
+    finally:
+        await chan.close()
+
+
+async def bob_endpoint(reader, writer, link, n_qubits, seed, sample_fraction=SAMPLE_FRACTION):
+    """Bob's side of one session; returns the session statistics."""
+    chan = FrameChannel(reader, writer)
+    rng = np.random.default_rng(seed)
+    round_trips = 0
+    result = {"ok": False, "key_bits": 0}
+    try:
+        session_id, bob_bases, bob_bits, detected = link.transmit(n_qubits)
+        cascade_seed, hash_seed = session_seeds(seed)
+
+        await chan.send(HELLO, HELLO_BODY.pack(session_id, seed))
+        await chan.send(BASES, pack_key(bob_bases).tobytes() + pack_key(detected).tobytes())
+        _, payload = await chan.receive(BASES)
+        round_trips += 1
+        alice_bases = unpack_bits(payload, n_qubits)
+        key = bob_bits[(alice_bases == bob_bases) & detected]
+
+        count = min(max(int(len(key) * sample_fraction), 1), len(key))
+        indices = np.sort(rng.choice(len(key), size=count, replace=False))
+        await chan.send(
+            SAMPLE,
+            struct.pack("!I", count) + indices.astype(">u4").tobytes() + pack_key(key[indices]).tobytes(),
+        )
+        _, payload = await chan.receive(QBER)
+        round_trips += 1
+        qber, accepted = QBER_BODY.unpack(payload)
+        result["qber"] = qber
+        if not accepted:
+            return result
+        key = np.delete(key, indices)
+
+        perms = cascade_permutations(len(key), N_PASSES, cascade_seed)
+        steps = cascade_steps(key, qber, perms)
+        answer = None
+        try:
+            while True:
+                pass_no, starts, ends = steps.send(answer)
+                await chan.send(
+                    PARITY_REQUEST,
+                    PARITY_HEADER.pack(pass_no, len(starts))
+                    + starts.astype(">u4").tobytes()
+                    + ends.astype(">u4").tobytes(),
+                )
+                _, payload = await chan.receive(PARITIES)
+                round_trips += 1
+                answer = unpack_bits(payload, len(starts))
+        except StopIteration as stop:
+            cascade = stop.value
+
+        final_key = amplify_key(cascade["key"], qber, cascade["bits_leaked"], hash_seed)
+        await chan.send(DONE, key_digest(final_key))
+        _, payload = await chan.receive(CONFIRM)
+        round_trips += 1
+        result.update(ok=bool(payload[0]) and len(final_key) > 0, key_bits=len(final_key),
+                      bits_leaked=cascade["bits_leaked"])
+        return result
+    finally:
+        result.update(round_trips=round_trips, bytes_sent=chan.bytes_sent, bytes_received=chan.bytes_received)
+        await chan.close()
+
+
+async def run_service(sessions=16, n_qubits=8192, eve=False, transport="tcp", concurrency=None,
+                      seed=None, sample_fraction=SAMPLE_FRACTION, channel=None):
+    """Start Alice, run many concurrent Bob sessions against her, summarise."""
+    link = QuantumLink(seed=seed, eve=eve, channel=channel)
+    handler = lambda reader, writer: alice_endpoint(reader, writer, link)  # noqa: E731
+
+    with tempfile.TemporaryDirectory() as tmp:
+        if transport == "unix":
+            path = os.path.join(tmp, "alice.sock")
+            server = await asyncio.start_unix_server(handler, path=path)
+            connect = lambda: asyncio.open_unix_connection(path)  # noqa: E731
+        else:
+            server = await asyncio.start_server(handler, host="127.0.0.1", port=0)
+            port = server.sockets[0].getsockname()[1]
+            connect = lambda: asyncio.open_connection("127.0.0.1", port)  # noqa: E731
+
+        limit = asyncio.Semaphore(concurrency or sessions)
+        session_seeds_ = np.random.SeedSequence(seed).generate_state(sessions, dtype=np.uint64)
+
+        async def one_session(i):
+            async with limit:
+                reader, writer = await connect()
+                return await bob_endpoint(reader, writer, link, n_qubits, int(session_seeds_[i]), sample_fraction)
+
+        start = time.perf_counter()
+        async with server:
+            results = await asyncio.gather(*(one_session(i) for i in range(sessions)))
+        elapsed = time.perf_counter() - start
+
+    ok = [r for r in results if r["ok"]]
+    return {
+        "sessions": sessions,
+        "accepted": len(ok),
+        "elapsed": elapsed,
+        "keys_per_s": len(ok) / elapsed,
+        "key_bits_per_s": sum(r["key_bits"] for r in ok) / elapsed,
+        "mean_round_trips": float(np.mean([r["round_trips"] for r in results])),
+        "mean_bytes": float(np.mean([r["bytes_sent"] + r["bytes_received"] for r in results])),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load-test BB84 key distribution over a local socket.")
+    parser.add_argument("--sessions", type=int, default=32)
+    parser.add_argument("--qubits", type=int, default=8192)
+    parser.add_argument("--concurrency", type=int, default=None)
+    parser.add_argument("--transport", choices=["tcp", "unix"], default="tcp")
+    parser.add_argument("--sample-fraction", type=float, default=SAMPLE_FRACTION)
+    parser.add_argument("--eve", action="store_true")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args(argv)
+
+    summary = asyncio.run(run_service(
+        args.sessions, args.qubits, args.eve, args.transport, args.concurrency, args.seed, args.sample_fraction,
+    ))
+    print(f"Sessions: {summary['accepted']}/{summary['sessions']} accepted in {summary['elapsed']:.2f}s")
+    print(f"Keys/s: {summary['keys_per_s']:.1f}  key bits/s: {summary['key_bits_per_s']:,.0f}")
+    print(f"Round trips/session: {summary['mean_round_trips']:.1f}  bytes/session: {summary['mean_bytes']:,.0f}")
+
+
+if __name__ == "__main__":
+    main()
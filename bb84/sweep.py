@@ -0,0 +1,124 @@
+import argparse
+import csv
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+
+from bb84.engine import QBER_THRESHOLD, get_engine, run_protocol, sift
+
+# -------------------------------
+# MONTE CARLO QBER SWEEPS
+# -------------------------------
+
+TRIALS_PER_TASK = 200
+HISTOGRAM_BINS = 1000  # QBER quantiles are read from a fixed histogram
+QUANTILES = (0.05, 0.5, 0.95)
+
+
+def run_trials(n_qubits, eve, n_trials, seed, engine="numpy"):
+    """QBER of n_trials independent transmissions (empty sift counts as 1.0)."""
+    engine = get_engine(engine, seed)
+    qbers = np.empty(n_trials)
+    for i in range(n_trials):
+        alice_key, bob_key, _ = sift(run_protocol(n_qubits, eve=eve, engine=engine))
+        qbers[i] = np.count_nonzero(alice_key != bob_key) / len(alice_key) if len(alice_key) > 0 else 1.0
+    return qbers
+
+
+class QberStats:
+    """Running aggregate for one grid cell: counts, sums and a QBER histogram."""
+
+    def __init__(self, n_qubits, eve, threshold=QBER_THRESHOLD):
+        self.n_qubits = n_qubits
+        self.eve = eve
+        self.threshold = threshold
+        self.trials = 0
+        self.total = 0.0
+        self.rejected = 0
+        self.histogram = np.zeros(HISTOGRAM_BINS + 1, dtype=np.int64)
+
+    def add(self, qbers):
+        self.trials += len(qbers)
+        self.total += float(qbers.sum())
+        self.rejected += int(np.count_nonzero(qbers > self.threshold))
+        np.add.at(self.histogram, np.rint(qbers * HISTOGRAM_BINS).astype(np.int64), 1)
+
+    def quantile(self, q):
+        cdf = np.cumsum(self.histogram)
+        return float(np.searchsorted(cdf, q * self.trials)) / HISTOGRAM_BINS
+
+    def row(self):
+        rejected_rate = self.rejected / self.trials if self.trials else 0.0
+        row = {
+            "qubits": self.n_qubits,
+            "eve": self.eve,
+            "trials": self.trials,
+            "mean_qber": self.total / self.trials if self.trials else 0.0,
+        }
+        for q in QUANTILES:
+            row[f"q{int(q * 100):02d}"] = self.quantile(q)
+        # An attack that passes the check is a false accept, a clean run
+        # that fails it is a false reject.
+        row["false_accept_rate"] = 1.0 - rejected_rate if self.eve else 0.0
+        row["false_reject_rate"] = 0.0 if self.eve else rejected_rate
+        return row
+
+
+def sweep(qubit_counts, eve_settings=(False, True), trials=1000, seed=None, workers=None,
+          engine="numpy", threshold=QBER_THRESHOLD, trials_per_task=TRIALS_PER_TASK):
+    """
+    Fan trials for every (qubits, eve) cell out over a process pool.
+    Each task gets its own SeedSequence child, so results are reproducible
+    for a given seed whatever the worker count. Returns one row per cell.
+    """
+    cells = [(n, eve) for n in qubit_counts for eve in eve_settings]
+    tasks = []
+    for n, eve in cells:
+        for start in range(0, trials, trials_per_task):
+            tasks.append((n, eve, min(trials_per_task, trials - start)))
+    seeds = np.random.SeedSequence(seed).spawn(len(tasks))
+
+    stats = {cell: QberStats(*cell, threshold=threshold) for cell in cells}
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {
+            pool.submit(run_trials, n, eve, count, task_seed, engine): (n, eve)
+            for (n, eve, count), task_seed in zip(tasks, seeds)
+        }
+        for future in as_completed(futures):
+            stats[futures[future]].add(future.result())
+    return [stats[cell].row() for cell in cells]
+
+
+def write_table(rows, stream):
+    writer = csv.DictWriter(stream, fieldnames=list(rows[0]))
+    writer.writeheader()
+    for row in rows:
+        writer.writerow({k: f"{v:.6f}" if isinstance(v, float) else v for k, v in row.items()})
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Monte Carlo sweep of BB84 QBER statistics.")
+    parser.add_argument("--qubits", type=int, nargs="+", default=[100, 350, 1000])
+    parser.add_argument("--eve", choices=["both", "on", "off"], default="both")
+    parser.add_argument("--trials", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--engine", default="numpy")
+    parser.add_argument("--threshold", type=float, default=QBER_THRESHOLD)
+    parser.add_argument("--output", help="CSV file (default: stdout)")
+    args = parser.parse_args(argv)
+
+    eve_settings = {"both": (False, True), "on": (True,), "off": (False,)}[args.eve]
+    rows = sweep(args.qubits, eve_settings, args.trials, args.seed, args.workers, args.engine, args.threshold)
+
+    if args.output:
+        with open(args.output, "w", newline="") as f:
+            write_table(rows, f)
+    else:
+        write_table(rows, sys.stdout)
+
+
+if __name__ == "__main__":
+    main()
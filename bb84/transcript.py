@@ -0,0 +1,214 @@
+import argparse
+import json
+import os
+
+import numpy as np
+
+from bb84.bitslice import popcount
+from bb84.crypto import pack_key, pack_with_carry
+from bb84.engine import get_engine, run_protocol
+from bb84.plotting import MAX_PLOT_POINTS, RunningQberCurve
+
+# -------------------------------
+# ON-DISK TRANSCRIPTS
+# -------------------------------
+# A transcript is a directory holding header.json plus one <column>.bits
+# file per per-qubit column. Each file is the column packed 8 qubits per
+# byte, in the np.packbits / pack_key layout. The writer appends chunk by
+# chunk and carries the bits of an unfinished byte over to the next chunk.
+# The reader memory-maps the files, so QBER, running curves and sample
+# rows of any index range only touch the bytes in that range.
+
+FORMAT = "bb84-transcript"
+VERSION = 1
+COLUMNS = ("alice_bits", "alice_bases", "eve_bases", "eve_bits", "bob_bases", "bob_bits", "detected")
+CHUNK_QUBITS = 1 << 23  # multiple of 8, so chunks start on byte boundaries
+BASIS_LABELS = np.array(["Z", "X"])
+
+
+class TranscriptWriter:
+    """Streams run_protocol transmissions into a transcript directory."""
+
+    def __init__(self, path, meta=None):
+        self.path = path
+        self.meta = dict(meta or {})
+        self.qubits = 0
+        self._files = None
+        self._carry = {}
+        os.makedirs(path, exist_ok=True)
+
+    def append(self, transmission):
+        columns = {name: transmission[name] for name in COLUMNS if transmission.get(name) is not None}
+        if self._files is None:
+            self._files = {name: open(os.path.join(self.path, f"{name}.bits"), "wb") for name in columns}
+            self._carry = {name: np.empty(0, dtype=np.uint8) for name in columns}
+        elif columns.keys() != self._files.keys():
+            raise ValueError(f"Transcript columns changed: {sorted(columns)} vs {sorted(self._files)}")
+
+        for name, bits in columns.items():
+            packed, self._carry[name] = pack_with_carry(self._carry[name], bits)
+            self._files[name].write(packed.tobytes())
+        self.qubits += len(transmission["alice_bits"])
+
+    def close(self):
+        for name, f in (self._files or {}).items():
+            f.write(pack_key(self._carry[name]).tobytes())
+            f.close()
+        header = {
+            "format": FORMAT,
+            "version": VERSION,
+            "qubits": self.qubits,
+            "columns": list(self._files or ()),
+            **self.meta,
+        }
+        with open(os.path.join(self.path, "header.json"), "w") as f:
+            json.dump(header, f, indent=2)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def record(path, n_qubits, eve=False, engine=None, seed=None, channel=None, chunk_qubits=CHUNK_QUBITS):
+    """Simulate n_qubits chunk by chunk straight into a transcript."""
+    engine = get_engine(engine, seed)
+    meta = {"eve": eve, "engine": engine.name, "seed": seed}
+    with TranscriptWriter(path, meta) as writer:
+        for start in range(0, n_qubits, chunk_qubits):
+            n = min(chunk_qubits, n_qubits - start)
+            writer.append(run_protocol(n, eve=eve, engine=engine, channel=channel))
+    return Transcript(path)
+
+
+def edge_mask(n_bytes, start_bit, stop_bit):
+    """Per-byte mask keeping bits [start_bit, stop_bit) of a byte range that starts at bit 0."""
+    mask = np.full(n_bytes, 0xFF, dtype=np.uint8)
+    mask[0] &= 0xFF >> start_bit
+    if stop_bit % 8:
+        mask[-1] &= (0xFF << (8 - stop_bit % 8)) & 0xFF
+    return mask
+
+
+class Transcript:
+    """Memory-mapped, read-only view of a transcript directory."""
+
+    def __init__(self, path):
+        self.path = path
+        with open(os.path.join(path, "header.json")) as f:
+            self.header = json.load(f)
+        if self.header.get("format") != FORMAT:
+            raise ValueError(f"{path} is not a BB84 transcript")
+        self.qubits = self.header["qubits"]
+        self._maps = {}
+        for name in self.header["columns"]:
+            file = os.path.join(path, f"{name}.bits")
+            if os.path.getsize(file):
+                self._maps[name] = np.memmap(file, dtype=np.uint8, mode="r")
+            else:
+                self._maps[name] = np.empty(0, dtype=np.uint8)  # np.memmap refuses empty files
+
+    @property
+    def columns(self):
+        return list(self._maps)
+
+    def _range(self, start, stop):
+        stop = self.qubits if stop is None else min(stop, self.qubits)
+        if not 0 <= start <= stop:
+            raise IndexError(f"Bad qubit range [{start}, {stop}) for {self.qubits} qubits")
+        return start, stop
+
+    def column(self, name, start=0, stop=None):
+        """Unpacked 0/1 values of one column for qubits [start, stop)."""
+        start, stop = self._range(start, stop)
+        packed = self._maps[name][start // 8:-(-stop // 8)]
+        offset = start // 8 * 8
+        return np.unpackbits(packed)[start - offset:stop - offset]
+
+    def chunks(self, start=0, stop=None, chunk_qubits=CHUNK_QUBITS):
+        """Yield (first qubit index, {column: unpacked values}) over [start, stop)."""
+        start, stop = self._range(start, stop)
+        pos = start
+        while pos < stop:
+            end = min((pos // chunk_qubits + 1) * chunk_qubits, stop)
+            yield pos, {name: self.column(name, pos, end) for name in self._maps}
+            pos = end
+
+    def qber(self, start=0, stop=None, chunk_qubits=CHUNK_QUBITS):
+        """Sifted length, errors and QBER over [start, stop), counted on packed bytes."""
+        start, stop = self._range(start, stop)
+        sifted = errors = 0
+        chunk_bytes = chunk_qubits // 8
+        first, last = start // 8, -(-stop // 8)
+        for lo in range(first, last, chunk_bytes):
+            hi = min(lo + chunk_bytes, last)
+            cols = {name: np.asarray(m[lo:hi]) for name, m in self._maps.items()}
+            mask = ~(cols["alice_bases"] ^ cols["bob_bases"]) & cols["detected"]
+            mask &= edge_mask(hi - lo, start - lo * 8 if lo == first else 0, stop - lo * 8 if hi == last else 0)
+            sifted += popcount(mask)
+            errors += popcount((cols["alice_bits"] ^ cols["bob_bits"]) & mask)
+        return {"sifted": sifted, "errors": errors, "qber": errors / sifted if sifted else 1.0}
+
+    def running_curve(self, start=0, stop=None, max_points=MAX_PLOT_POINTS):
+        """Downsampled running-QBER curve of [start, stop), x in 1-based qubit numbers."""
+        curve = RunningQberCurve(max_points)
+        for pos, cols in self.chunks(start, stop):
+            keep = (cols["alice_bases"] == cols["bob_bases"]) & cols["detected"].astype(bool)
+            idx = np.flatnonzero(keep)
+            curve.add(pos + idx + 1, cols["alice_bits"][idx] != cols["bob_bits"][idx])
+        return curve
+
+    def sample_rows(self, start=0, limit=20):
+        """Table rows for qubits [start, start + limit), as shown in the app."""
+        stop = min(start + limit, self.qubits)
+        cols = {name: self.column(name, start, stop) for name in self._maps}
+        eve = "eve_bases" in cols
+        rows = []
+        for k in range(stop - start):
+            status = "Discarded"
+            if not cols["detected"][k]:
+                status = "No click"
+            elif cols["alice_bases"][k] == cols["bob_bases"][k]:
+                status = "YES" if cols["alice_bits"][k] == cols["bob_bits"][k] else "ERROR"
+            rows.append({
+                "Idx": start + k + 1,
+                "Alice Bit": int(cols["alice_bits"][k]),
+                "Alice Basis": str(BASIS_LABELS[cols["alice_bases"][k]]),
+                "Eve Basis": str(BASIS_LABELS[cols["eve_bases"][k]]) if eve else "-",
+                "Bob Basis": str(BASIS_LABELS[cols["bob_bases"][k]]),
+                "Bob Bit": int(cols["bob_bits"][k]),
+                "Status": status,
+            })
+        return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Record or analyse an on-disk BB84 transcript.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    rec = sub.add_parser("record", help="simulate a run straight to disk")
+    rec.add_argument("path")
+    rec.add_argument("--qubits", type=lambda s: int(float(s)), default=10**7)
+    rec.add_argument("--eve", action="store_true")
+    rec.add_argument("--seed", type=int, default=None)
+    for name in ("qber", "rows"):
+        cmd = sub.add_parser(name, help=f"{name} of a qubit index range")
+        cmd.add_argument("path")
+        cmd.add_argument("--start", type=lambda s: int(float(s)), default=0)
+        cmd.add_argument("--stop", type=lambda s: int(float(s)), default=None)
+    args = parser.parse_args(argv)
+
+    if args.command == "record":
+        transcript = record(args.path, args.qubits, eve=args.eve, seed=args.seed)
+        print(f"Recorded {transcript.qubits:,} qubits to {args.path}")
+    elif args.command == "qber":
+        result = Transcript(args.path).qber(args.start, args.stop)
+        print(f"Sifted: {result['sifted']:,}  errors: {result['errors']:,}  QBER: {result['qber']:.4%}")
+    else:
+        limit = (args.stop - args.start) if args.stop is not None else 20
+        for row in Transcript(args.path).sample_rows(args.start, limit):
+            print(row)
+
+
+if __name__ == "__main__":
+    main()
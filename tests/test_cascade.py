@@ -0,0 +1,59 @@
+import numpy as np
+import pytest
+
+from bb84.cascade import reconcile
+from bb84.privacy import binary_entropy
+
+N_BITS = 10**6
+
+
+def noisy_pair(n, qber, seed):
+    rng = np.random.default_rng(seed)
+    alice = rng.integers(0, 2, n, dtype=np.uint8)
+    flips = (rng.random(n) < qber).astype(np.uint8)
+    return alice, alice ^ flips
+
+
+@pytest.mark.parametrize("qber", [0.01, 0.05, 0.11])
+def test_reconcile_leaves_no_residual_errors(qber):
+    alice, bob = noisy_pair(N_BITS, qber, seed=1)
+    initial_errors = int(np.count_nonzero(alice != bob))
+    result = reconcile(alice, bob, qber, seed=2)
+    assert int(np.count_nonzero(result["key"] != alice)) == 0
+    assert result["corrected"] == initial_errors
+
+
+@pytest.mark.parametrize("qber", [0.01, 0.05, 0.11])
+def test_reconcile_leak_is_near_the_shannon_limit(qber):
+    alice, bob = noisy_pair(N_BITS, qber, seed=3)
+    leaked = reconcile(alice, bob, qber, seed=4)["bits_leaked"]
+    shannon = N_BITS * binary_entropy(qber)
+    assert shannon <= leaked <= 2 * shannon
+
+
+@pytest.mark.parametrize("n_errors", [1, 2, 5, 20])
+def test_reconcile_corrects_short_keys(n_errors):
+    """Round-sized keys, where uncapped block doubling ended in whole-key parities."""
+    n = 2048
+    for trial in range(100):
+        rng = np.random.default_rng(trial)
+        alice = rng.integers(0, 2, n, dtype=np.uint8)
+        bob = alice.copy()
+        bob[rng.choice(n, n_errors, replace=False)] ^= 1
+        result = reconcile(alice, bob, n_errors / n, seed=trial)
+        assert np.array_equal(result["key"], alice), f"trial {trial}"
+
+
+def test_reconcile_does_not_modify_inputs():
+    alice, bob = noisy_pair(10_000, 0.05, seed=5)
+    alice_copy, bob_copy = alice.copy(), bob.copy()
+    reconcile(alice, bob, 0.05, seed=6)
+    assert np.array_equal(alice, alice_copy)
+    assert np.array_equal(bob, bob_copy)
+
+
+def test_reconcile_identical_keys_needs_no_corrections():
+    alice, _ = noisy_pair(10_000, 0.0, seed=7)
+    result = reconcile(alice, alice.copy(), 0.01, seed=8)
+    assert result["corrected"] == 0
+    assert np.array_equal(result["key"], alice)
@@ -0,0 +1,89 @@
+import threading
+
+import numpy as np
+import pytest
+
+from bb84.crypto import pack_key
+from bb84.keypool import KeyPool
+
+BLOCK_BITS = 1001  # not a whole number of bytes, so blocks straddle byte boundaries
+
+
+def synthetic_blocks(seed=0, ok=True):
+    """Endless key_blocks() stand-in with matching random keys."""
+    rng = np.random.default_rng(seed)
+    round_no = 0
+    while True:
+        key = rng.integers(0, 2, BLOCK_BITS, dtype=np.uint8)
+        yield {"round": round_no, "alice_key": key, "bob_key": key.copy(), "qber": 0.0, "ok": ok, "bits_leaked": 10}
+        round_no += 1
+
+
+def failing_blocks():
+    raise ValueError("engine broke")
+    yield  # makes this a generator
+
+
+def test_take_hands_out_the_stream_in_order_without_reuse():
+    reference = synthetic_blocks()
+    expected = pack_key(np.concatenate([next(reference)["alice_key"] for _ in range(40)]))
+    with KeyPool(synthetic_blocks(), high_water_bytes=512, timeout=10) as pool:
+        taken = [pool.take(n) for n in (1, 100, 7, 900, 3000)]
+    alice = np.concatenate([a for a, _ in taken])
+    bob = np.concatenate([b for _, b in taken])
+    assert np.array_equal(alice, bob)
+    assert np.array_equal(alice, expected[: len(alice)])
+    assert pool.bytes_served == len(alice)
+
+
+def test_refill_tops_up_to_the_high_water_mark():
+    with KeyPool(synthetic_blocks(), high_water_bytes=1024, timeout=10) as pool:
+        pool.take(1024)
+        pool.take(1)  # waits for the refill thread
+        metrics = pool.metrics()
+    assert metrics["rounds"] >= 8
+    assert metrics["refill_bits_per_s"] > 0
+    assert pool.bits_leaked == 10 * metrics["rounds"]
+
+
+def test_put_block_is_not_counted_as_refill():
+    first = next(synthetic_blocks(seed=1))
+    pool = KeyPool(synthetic_blocks(), high_water_bytes=64)
+    pool.put(first)
+    alice, bob = pool.take(BLOCK_BITS // 8)
+    assert np.array_equal(alice, pack_key(first["alice_key"])[: BLOCK_BITS // 8])
+    assert pool.bits_drawn == BLOCK_BITS
+    assert pool.metrics()["refill_bits_per_s"] == 0.0
+    with pytest.raises(ValueError):
+        pool.put(next(synthetic_blocks(ok=False)))
+
+
+def test_generator_error_fails_the_pool():
+    with KeyPool(failing_blocks(), timeout=10) as pool:
+        with pytest.raises(ValueError, match="engine broke"):
+            pool.take(1)
+        assert pool.metrics()["failed"]
+
+
+def test_consecutive_aborts_fail_the_pool():
+    with KeyPool(synthetic_blocks(ok=False), max_consecutive_aborts=3, timeout=10) as pool:
+        with pytest.raises(RuntimeError, match="3 consecutive key rounds"):
+            pool.take(1)
+    assert pool.aborted == 3
+
+
+def test_starvation_counts_once_per_request():
+    release = threading.Event()
+
+    def slow_blocks():
+        release.wait()
+        yield from synthetic_blocks()
+
+    with KeyPool(slow_blocks()) as pool:
+        # One request polled in short slices, as the app's live demo does
+        for retry in (False, True, True):
+            with pytest.raises(TimeoutError):
+                pool.take(10, timeout=0.01, retry=retry)
+        release.set()
+        pool.take(10, timeout=10, retry=True)
+    assert pool.starvations == 1
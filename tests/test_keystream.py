@@ -0,0 +1,26 @@
+from functools import partial
+
+import numpy as np
+import pytest
+
+from bb84.attacks import ATTACKS
+from bb84.keystream import key_blocks
+
+ROUNDS = 100
+
+
+@pytest.mark.parametrize("estimation", ["full", "sample"])
+def test_ok_blocks_have_matching_keys_under_a_light_attack(estimation):
+    """A 1% intercept-resend passes the QBER check, so Cascade must fix every error it causes."""
+    eve = partial(ATTACKS["intercept-resend"], fraction=0.01)
+    blocks = [block for _, block in zip(range(ROUNDS), key_blocks(eve=eve, seed=11, estimation=estimation))]
+    ok_blocks = [block for block in blocks if block["ok"]]
+    assert len(ok_blocks) > ROUNDS // 2
+    for block in ok_blocks:
+        assert np.array_equal(block["alice_key"], block["bob_key"]), f"round {block['round']}"
+
+
+def test_sample_estimation_rejects_full_intercept_resend():
+    blocks = [block for _, block in zip(range(10), key_blocks(eve=True, seed=12, estimation="sample"))]
+    assert not any(block["ok"] for block in blocks)
+    assert all(block["qber_bound"] > block["qber"] for block in blocks)
@@ -0,0 +1,44 @@
+import numpy as np
+import pytest
+
+from bb84.privacy import SECURITY_MARGIN, amplify, binary_entropy, secure_key_length, toeplitz_hash
+
+
+def explicit_toeplitz_hash(key, out_len, seed_bits):
+    """T @ key mod 2 with the m x n matrix T[i, j] = seed[i - j + n - 1] built out."""
+    n = len(key)
+    i, j = np.indices((out_len, n))
+    matrix = np.asarray(seed_bits, dtype=np.int64)[i - j + n - 1]
+    return (matrix @ np.asarray(key, dtype=np.int64) % 2).astype(np.uint8)
+
+
+@pytest.mark.parametrize("n, out_len", [(1, 1), (7, 3), (64, 64), (1000, 313), (4096, 2048)])
+def test_toeplitz_hash_matches_matrix_product(n, out_len):
+    rng = np.random.default_rng(n)
+    key = rng.integers(0, 2, n, dtype=np.uint8)
+    seed_bits = rng.integers(0, 2, n + out_len - 1, dtype=np.uint8)
+    assert np.array_equal(toeplitz_hash(key, out_len, seed_bits), explicit_toeplitz_hash(key, out_len, seed_bits))
+
+
+def test_toeplitz_hash_empty_output():
+    assert len(toeplitz_hash(np.ones(10, dtype=np.uint8), 0, np.ones(9, dtype=np.uint8))) == 0
+    assert len(toeplitz_hash(np.zeros(0, dtype=np.uint8), 5, np.ones(4, dtype=np.uint8))) == 0
+
+
+def test_secure_key_length():
+    n = 10_000
+    assert secure_key_length(n, 0.0) == n - SECURITY_MARGIN
+    assert secure_key_length(n, 0.05) == int(np.floor(n * (1 - 2 * binary_entropy(0.05)) - SECURITY_MARGIN))
+    # A measured leak replaces the ideal n * h(QBER) estimate
+    assert secure_key_length(n, 0.05, bits_leaked=3000) == int(np.floor(n * (1 - binary_entropy(0.05)) - 3000 - SECURITY_MARGIN))
+    assert secure_key_length(n, 0.11) == 0  # h(0.11) is about 0.5: nothing left
+    assert secure_key_length(10, 0.0) == 0
+
+
+def test_amplify_gives_matching_keys_of_secure_length():
+    rng = np.random.default_rng(0)
+    key = rng.integers(0, 2, 5000, dtype=np.uint8)
+    alice, bob = amplify(key, key.copy(), 0.02, bits_leaked=800, seed=1)
+    assert len(alice) == secure_key_length(5000, 0.02, 800)
+    assert np.array_equal(alice, bob)
+    assert np.array_equal(amplify(key, key, 0.02, bits_leaked=800, seed=1)[0], alice)  # same public seed, same hash